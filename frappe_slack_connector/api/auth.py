@@ -4,7 +4,7 @@ from frappe import _
 from frappe_slack_connector.db.user_meta import update_user_meta
 from frappe_slack_connector.helpers.error import generate_error_log
 from frappe_slack_connector.helpers.http_response import send_http_response
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import get_slack_integration
 
 
 @frappe.whitelist()
@@ -16,7 +16,7 @@ def connect_slack(user_email: str | None = None) -> None:
         return send_http_response(_("User email is required"), status_code=400)
 
     try:
-        slack = SlackIntegration()
+        slack = get_slack_integration()
         slack_user = slack.get_slack_user(user_email, check_meta=False)
         if not slack_user:
             frappe.msgprint(
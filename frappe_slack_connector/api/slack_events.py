@@ -0,0 +1,49 @@
+import frappe
+
+from frappe_slack_connector.api.sync_slack_settings import sync_slack_user
+from frappe_slack_connector.helpers.error import generate_error_log
+from frappe_slack_connector.helpers.http_response import send_http_response
+from frappe_slack_connector.slack.app import get_slack_integration
+
+DIRECTORY_EVENTS = ("user_change", "team_join")
+
+
+@frappe.whitelist(allow_guest=True)  # nosemgrep
+def event():
+    """
+    Handle the Slack Events API callbacks
+    Keeps the User Meta in sync with the Slack directory as users join
+    or update their profile, instead of waiting for the weekly full sync
+    """
+    slack = get_slack_integration()
+    try:
+        slack.verify_slack_request(
+            signature=frappe.request.headers.get("X-Slack-Signature"),
+            timestamp=frappe.request.headers.get("X-Slack-Request-Timestamp"),
+            req_data=frappe.request.get_data(as_text=True),
+        )
+    except Exception:
+        return send_http_response("Invalid request", status_code=403)
+
+    payload = frappe.request.get_json(silent=True) or {}
+    event_type = payload.get("type")
+
+    # Slack verifies the endpoint by sending a challenge when the Request URL is set
+    if event_type == "url_verification":
+        return send_http_response(body={"challenge": payload.get("challenge")})
+
+    if event_type == "event_callback":
+        slack_event = payload.get("event", {})
+        if slack_event.get("type") in DIRECTORY_EVENTS and slack_event.get("user"):
+            frappe.enqueue(sync_slack_user, queue="short", user=slack_event["user"])
+    else:
+        generate_error_log(
+            title="Unknown event type",
+            message=event_type,
+        )
+
+    # Acknowledge right away, Slack retries the event if it is not acknowledged in 3 seconds
+    return send_http_response(
+        status_code=200,
+        is_empty=True,
+    )
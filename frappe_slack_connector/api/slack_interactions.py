@@ -2,16 +2,23 @@ import json
 
 import frappe
 from frappe import _
+from slack_sdk.webhook import WebhookClient
 
 from frappe_slack_connector.helpers.error import generate_error_log
 from frappe_slack_connector.helpers.http_response import send_http_response
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.helpers.str_utils import strip_html_tags
+from frappe_slack_connector.slack.app import SlackIntegration, get_slack_integration
+from frappe_slack_connector.slack.interactions.approve_leave import LEAVE_BULK_ACTIONS_BLOCK
+from frappe_slack_connector.slack.interactions.approve_leave import bulk_handler as approve_leave_bulk_handler
 from frappe_slack_connector.slack.interactions.approve_leave import handler as approve_leave_handler
+from frappe_slack_connector.slack.interactions.submit_leave import enqueue_handler as submit_leave_enqueue
 from frappe_slack_connector.slack.interactions.submit_leave import half_day_checkbox_handler
 from frappe_slack_connector.slack.interactions.submit_leave import handler as submit_leave_handler
+from frappe_slack_connector.slack.interactions.submit_timesheet import enqueue_handler as submit_timesheet_enqueue
 from frappe_slack_connector.slack.interactions.submit_timesheet import handler as submit_timesheet_handler
 from frappe_slack_connector.slack.interactions.timesheet_filters import handle_timesheet_filter
 from frappe_slack_connector.slack.interactions.timesheet_modal import show_timesheet_modal
+from frappe_slack_connector.slack.interactions.timesheet_options import handler as timesheet_options_handler
 
 
 @frappe.whitelist(allow_guest=True)  # nosemgrep
@@ -21,7 +28,7 @@ def event():
     This endpoint is called by the Slack API when an interaction occurs, like a button click
     Need to route the interaction to the appropriate handler
     """
-    slack = SlackIntegration()
+    slack = get_slack_integration()
 
     try:
         try:
@@ -52,42 +59,112 @@ def event():
             )
 
         payload = json.loads(payload)
-        event_type = payload.get("type")
-
-        if event_type == "block_actions":
-            block_id = payload["actions"][0]["block_id"]
-            action_id = payload["actions"][0]["action_id"]
-
-            # Ignore the action if starts with ignore
-            # Start the action_id in the block to "ignore" if the
-            # action payload is not required
-            if action_id.startswith("ignore"):
-                return
-            elif block_id == "daily_reminder_button":
-                return show_timesheet_modal(slack, payload["user"]["id"], payload["trigger_id"])
-            elif block_id == "half_day_checkbox":
-                return half_day_checkbox_handler(slack, payload)
-            elif block_id in ("project_block", "task_block"):
-                return handle_timesheet_filter(slack, payload)
-            else:
-                return approve_leave_handler(slack, payload)
-
-        elif event_type == "view_submission":
-            if payload["view"]["callback_id"] == "timesheet_modal":
-                return submit_timesheet_handler(slack, payload)
-
-            return submit_leave_handler(slack, payload)
-
-        else:
-            generate_error_log(
-                title="Unknown event type",
-                message=event_type,
-            )
-            return send_http_response(
-                message="Unknown event type",
-                status_code=400,
-            )
+        if slack.process_interactions_in_background:
+            return defer_interaction(slack, payload)
+        return handle_interaction(slack, payload)
 
     except Exception as e:
         generate_error_log("Error handling the event", exception=e)
         frappe.throw(_("An error occurred while handling the event"), frappe.PermissionError)
+
+
+def handle_interaction(slack: SlackIntegration, payload: dict, deferred: bool = False):
+    """
+    Route the interaction payload to the appropriate handler
+    deferred is set when processed in a background job, after the trigger_id has expired
+    """
+    event_type = payload.get("type")
+
+    if event_type == "block_actions":
+        block_id = payload["actions"][0]["block_id"]
+        action_id = payload["actions"][0]["action_id"]
+
+        # Ignore the action if starts with ignore
+        # Start the action_id in the block to "ignore" if the
+        # action payload is not required
+        if action_id.startswith("ignore"):
+            return
+        elif block_id == "daily_reminder_button":
+            return show_timesheet_modal(slack, payload["user"]["id"], payload["trigger_id"])
+        elif block_id == "half_day_checkbox":
+            return half_day_checkbox_handler(slack, payload)
+        elif block_id == "task_block":
+            return handle_timesheet_filter(slack, payload)
+        elif block_id == LEAVE_BULK_ACTIONS_BLOCK:
+            return approve_leave_bulk_handler(slack, payload)
+        else:
+            return approve_leave_handler(slack, payload, deferred=deferred)
+
+    elif event_type == "view_submission":
+        if payload["view"]["callback_id"] == "timesheet_modal":
+            return submit_timesheet_handler(slack, payload)
+
+        return submit_leave_handler(slack, payload)
+
+    elif event_type == "block_suggestion":
+        return timesheet_options_handler(slack, payload)
+
+    else:
+        generate_error_log(
+            title="Unknown event type",
+            message=event_type,
+        )
+        return send_http_response(
+            message="Unknown event type",
+            status_code=400,
+        )
+
+
+def defer_interaction(slack: SlackIntegration, payload: dict):
+    """
+    Acknowledge the interaction right away and process it in a background job
+    Actions that open a view need the short-lived trigger_id, and submissions
+    need their validation errors in the response, so those parts stay inline
+    Task selections in the timesheet modal stay inline, as there is no response_url
+    to report their errors to once the trigger_id has expired
+    Bulk leave actions stay inline too, as they only enqueue their own job
+    Options load requests (block_suggestion) are always answered inline
+    """
+    event_type = payload.get("type")
+
+    if event_type == "block_actions":
+        block_id = payload["actions"][0]["block_id"]
+        action_id = payload["actions"][0]["action_id"]
+        if action_id.startswith("ignore") or block_id in (
+            "daily_reminder_button",
+            "task_block",
+            LEAVE_BULK_ACTIONS_BLOCK,
+        ):
+            return handle_interaction(slack, payload)
+
+        frappe.enqueue(process_interaction, queue="short", payload=payload)
+        return send_http_response(
+            status_code=200,
+            is_empty=True,
+        )
+
+    elif event_type == "view_submission":
+        if payload["view"]["callback_id"] == "timesheet_modal":
+            return submit_timesheet_enqueue(slack, payload)
+
+        return submit_leave_enqueue(slack, payload)
+
+    return handle_interaction(slack, payload)
+
+
+def process_interaction(payload: dict):
+    """
+    Background job to process a deferred block action
+    Reports failures back to the user via the response_url of the interaction
+    """
+    slack = get_slack_integration()
+    try:
+        handle_interaction(slack, payload, deferred=True)
+    except Exception as e:
+        generate_error_log("Error processing Slack Interaction", exception=e)
+        if payload.get("response_url"):
+            WebhookClient(payload["response_url"]).send(
+                text=f":warning: There was an error processing your request\n```{strip_html_tags(str(e))}```",
+                response_type="ephemeral",
+                replace_original=False,
+            )
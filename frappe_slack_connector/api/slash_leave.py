@@ -7,7 +7,7 @@ from hrms.hr.doctype.leave_application.leave_application import (
 from frappe_slack_connector.db.user_meta import get_employeeid_from_slackid
 from frappe_slack_connector.helpers.error import generate_error_log
 from frappe_slack_connector.helpers.http_response import send_http_response
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import get_slack_integration
 
 
 @frappe.whitelist(allow_guest=True)  # nosemgrep
@@ -16,7 +16,7 @@ def slash_leave():
     API endpoint for the Slash command to open the modal for applying leave
     Slash command: /apply-leave
     """
-    slack = SlackIntegration()
+    slack = get_slack_integration()
     try:
         slack.verify_slack_request(
             signature=frappe.request.headers.get("X-Slack-Signature"),
@@ -1,7 +1,7 @@
 import frappe
 
 from frappe_slack_connector.helpers.http_response import send_http_response
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import get_slack_integration
 from frappe_slack_connector.slack.interactions.timesheet_modal import show_timesheet_modal
 
 
@@ -11,7 +11,7 @@ def slash_timesheet():
     API endpoint for the Slash command to open the modal for timesheet creation
     Slash command: /timesheet
     """
-    slack = SlackIntegration()
+    slack = get_slack_integration()
     slack_userid = frappe.form_dict.get("user_id")
     slack_trigger_id = frappe.form_dict.get("trigger_id")
 
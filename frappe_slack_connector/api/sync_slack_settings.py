@@ -1,9 +1,14 @@
 import frappe
 from frappe import _
+from slack_sdk.errors import SlackApiError
 
-from frappe_slack_connector.db.user_meta import update_user_meta
+from frappe_slack_connector.db.user_meta import bulk_update_user_meta, get_slack_details, update_user_meta
 from frappe_slack_connector.helpers.error import generate_error_log
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import SlackIntegration, get_slack_integration
+
+SLACK_SYNC_CURSOR_KEY = "slack_user_sync_cursor"
+# Kept longer than the weekly schedule, so that the next run resumes an interrupted sync
+SLACK_SYNC_CURSOR_EXPIRY = 8 * 24 * 60 * 60  # seconds
 
 
 @frappe.whitelist()
@@ -19,51 +24,56 @@ def sync_slack_data():
 def sync_slack_job(notify: bool = False):
     """
     Background job to sync the Slack data with the User Meta
+    The Slack users are processed page by page, and the cursor of the next page
+    is checkpointed so that an interrupted sync resumes where it stopped
     """
     try:
-        slack = SlackIntegration()
-        slack_users = slack.get_slack_users()
-
-        # Check Users in Slack but not in ERPNext
-        users_not_found = []
-        for email, slack_details in slack_users.items():
-            try:
-                update_user_meta(
-                    {
-                        "custom_slack_userid": slack_details["id"],
-                        "custom_slack_username": slack_details["name"],
-                    },
-                    user=email,
-                )
-            except Exception as e:
-                users_not_found.append((email, str(e)))
+        slack = get_slack_integration()
+        result = frappe._dict(inserted=0, updated=0, unchanged=0, not_found=[])
 
-        if notify:
-            frappe.msgprint(_("Slack data synced successfully"), realtime=True, indicator="green")
+        cursor = frappe.cache.get_value(SLACK_SYNC_CURSOR_KEY)
+        for slack_users, next_cursor in slack.iter_slack_users(cursor=cursor):
+            # Check Users in Slack but not in ERPNext
+            page_result = bulk_update_user_meta(slack_users)
+            result.inserted += page_result.inserted
+            result.updated += page_result.updated
+            result.unchanged += page_result.unchanged
+            result.not_found.extend(page_result.not_found)
 
-        # Check and display employees in ERPNext but not in Slack
-        employees = frappe.get_all(
-            "Employee",
-            filters={"status": "Active"},
-            fields=["user_id", "employee_name"],
-        )
+            if next_cursor:
+                frappe.cache.set_value(SLACK_SYNC_CURSOR_KEY, next_cursor, expires_in_sec=SLACK_SYNC_CURSOR_EXPIRY)
+
+        frappe.cache.delete_value(SLACK_SYNC_CURSOR_KEY)
+        users_not_found = result.not_found
+
+        if notify:
+            frappe.msgprint(
+                _("Slack data synced successfully: {0} added, {1} updated, {2} unchanged").format(
+                    result.inserted, result.updated, result.unchanged
+                ),
+                realtime=True,
+                indicator="green",
+            )
 
-        unset_employees = []
-        for employee in employees:
-            if slack_users.get(employee.user_id) is None:
-                unset_employees.append(employee.employee_name)
+        # Check and display employees in ERPNext but not linked to Slack
+        employees = frappe.get_all("Employee", filters={"status": "Active"}, pluck="name")
+        unset_employees = [
+            details.employee_name
+            for details in get_slack_details(employee_ids=employees).values()
+            if not details.slack_id
+        ]
 
         if users_not_found:
             if notify:
                 frappe.msgprint(
-                    f"Users not found in ERPNext: {', '.join(user[0] for user in users_not_found)}",
+                    f"Users not found in ERPNext: {', '.join(users_not_found)}",
                     title="Warning",
                     indicator="orange",
                     realtime=True,
                 )
             generate_error_log(
                 title="Users not found in ERPNext",
-                message="\n".join(user[1] for user in users_not_found),
+                message="\n".join(users_not_found),
             )
 
         if unset_employees:
@@ -75,9 +85,46 @@ def sync_slack_job(notify: bool = False):
             )
 
     except Exception as e:
+        # Start over right away if the checkpointed cursor is no longer valid
+        if isinstance(e, SlackApiError) and e.response.get("error") == "invalid_cursor":
+            frappe.cache.delete_value(SLACK_SYNC_CURSOR_KEY)
+            frappe.enqueue(sync_slack_job, queue="long", notify=notify)
+            return
+
         generate_error_log(
             title="Error syncing Slack data",
             exception=e,
             msgprint=notify,
             realtime=notify,
         )
+
+
+def sync_slack_user(user: dict):
+    """
+    Background job to apply a single Slack user change to the User Meta
+    Triggered by the `user_change` and `team_join` Slack events
+    """
+    member = SlackIntegration.get_member_details(user)
+    if member is None:
+        # Unlink the deactivated Slack user, if it was linked before
+        email = user.get("profile", {}).get("email")
+        if email and user.get("deleted"):
+            update_user_meta(
+                {"custom_slack_userid": None, "custom_slack_username": None, "custom_slack_timezone": None},
+                user=email,
+                upsert=False,
+            )
+        return
+
+    email, slack_details = member
+    if not frappe.db.exists("User", email):
+        return
+
+    update_user_meta(
+        {
+            "custom_slack_userid": slack_details["id"],
+            "custom_slack_username": slack_details["name"],
+            "custom_slack_timezone": slack_details["tz"],
+        },
+        user=email,
+    )
@@ -3,7 +3,7 @@ from frappe import _
 
 from frappe_slack_connector.helpers.error import generate_error_log
 from frappe_slack_connector.helpers.http_response import send_http_response
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import get_slack_integration
 
 
 @frappe.whitelist()
@@ -15,7 +15,7 @@ def test_channel(channel_id: str | None = None):
     if channel_id is None:
         return send_http_response(_("Channel ID is required"), status_code=400)
 
-    slack = SlackIntegration()
+    slack = get_slack_integration()
     try:
         slack.slack_app.client.chat_postMessage(
             channel=channel_id,
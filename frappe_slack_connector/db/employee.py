@@ -109,3 +109,49 @@ def check_if_date_is_holiday(date: datetime.date, employee: str) -> bool:
         },
     )
     return any((is_holiday, is_leave))
+
+
+def get_holiday_lists_for_employees(employees: list) -> dict:
+    """
+    Get the holiday list for each of the given employee rows
+    Falls back to the default holiday list of the employee's company
+    The rows are expected to have the `name`, `holiday_list` and `company` fields
+    """
+    companies = list({employee.company for employee in employees if not employee.holiday_list and employee.company})
+    company_holiday_lists = {}
+    if companies:
+        company_holiday_lists = dict(
+            frappe.get_all(
+                "Company",
+                filters={"name": ["in", companies]},
+                fields=["name", "default_holiday_list"],
+                as_list=True,
+            )
+        )
+
+    return {
+        employee.name: employee.holiday_list or company_holiday_lists.get(employee.company) for employee in employees
+    }
+
+
+def get_holiday_dates(holiday_lists: list, from_date: datetime.date, to_date: datetime.date) -> dict:
+    """
+    Get the holiday dates between the given dates for each of the holiday lists
+    """
+    holiday_lists = [holiday_list for holiday_list in holiday_lists if holiday_list]
+    holiday_dates = {holiday_list: set() for holiday_list in holiday_lists}
+    if not holiday_lists:
+        return holiday_dates
+
+    holidays = frappe.get_all(
+        "Holiday",
+        filters={
+            "parent": ["in", holiday_lists],
+            "holiday_date": ["between", [from_date, to_date]],
+        },
+        fields=["parent", "holiday_date"],
+    )
+    for holiday in holidays:
+        holiday_dates[holiday.parent].add(holiday.holiday_date)
+
+    return holiday_dates
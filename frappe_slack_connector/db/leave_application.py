@@ -2,22 +2,25 @@ import frappe
 from frappe.model.workflow import apply_workflow
 from frappe.utils import today
 
+from frappe_slack_connector.db.user_meta import get_slack_details
+from frappe_slack_connector.helpers.capabilities import has_capability
+
 
 def custom_fields_exist() -> bool:
     """
     Check if the custom fields for rtCamp exist in the Leave Application doctype
     """
-    # Check if the custom fields exist in the Leave Application doctype
-    return frappe.get_meta("Leave Application").has_field("custom_first_halfsecond_half")
+    return has_capability("leave_half_day_fields")
 
 
-def get_employees_on_leave() -> list:
+def get_employees_on_leave(date: str | None = None) -> list:
     """
-    Get all employees on leave today
+    Get all employees on leave on the given date (defaults to today)
     """
-    current_date = today()
+    current_date = date or today()
 
     fields = [
+        "name",
         "employee",
         "employee_name",
         "leave_type",
@@ -31,23 +34,61 @@ def get_employees_on_leave() -> list:
     if custom_fields_exist():
         fields.append("custom_first_halfsecond_half")
 
+    filters = {
+        "from_date": ("<=", current_date),
+        "to_date": (">=", current_date),
+        "status": (
+            "in",
+            ["Open", "Approved"],
+        ),
+    }
     # Query Leave Application doctype
     leave_applications = frappe.get_all(
+        "Leave Application",
+        filters=filters,
+        fields=fields,
+        order_by="to_date asc",
+    )
+
+    return leave_applications
+
+
+def get_attendance_snapshot(date: str | None = None) -> list:
+    """
+    Get the leave applications of the employees on leave on the given date (defaults to today),
+    along with their Slack IDs resolved in a single query
+    Built when the attendance summary is sent, so the Slack IDs are always current
+    """
+    leaves = get_employees_on_leave(date)
+    slack_details = get_slack_details(employee_ids=[leave.employee for leave in leaves])
+    for leave in leaves:
+        slack = slack_details.get(leave.employee)
+        leave.slack_id = slack.slack_id if slack else None
+    return leaves
+
+
+def get_leave_applications(employees: list, from_date: str, to_date: str) -> list:
+    """
+    Get the open and approved leave applications of the given employees
+    which overlap with the given date range
+    """
+    if not employees:
+        return []
+
+    return frappe.get_all(
         "Leave Application",
         filters={
-            "from_date": ("<=", current_date),
-            "to_date": (">=", current_date),
+            "employee": ("in", employees),
+            "from_date": ("<=", to_date),
+            "to_date": (">=", from_date),
             "status": (
                 "in",
                 ["Open", "Approved"],
             ),
         },
-        fields=fields,
-        order_by="to_date asc",
+        fields=["employee", "from_date", "to_date", "half_day", "half_day_date"],
     )
 
-    return leave_applications
-
 
 def approve_leave(leave_id: str) -> None:
     """
@@ -1,9 +1,15 @@
+import time
 from datetime import timedelta
 
 import frappe
-from frappe.utils import datetime, get_datetime
+from frappe.model.document import Document
+from frappe.query_builder.functions import Sum
+from frappe.utils import datetime, get_datetime, getdate
 
-from frappe_slack_connector.db.employee import get_employee_from_user
+from frappe_slack_connector.helpers.capabilities import has_capability
+
+TIMESHEET_OPTIONS_CACHE_KEY = "slack_timesheet_options"
+TIMESHEET_OPTIONS_CACHE_TTL = 5 * 60  # seconds
 
 
 # NOTE: Slack supports a maximum of 100 options in a select menu
@@ -56,66 +62,196 @@ def get_user_tasks(
     return tasks
 
 
-def get_employee_working_hours(employee: str = "") -> dict:
+def search_user_projects(user: str, query: str | None = None, limit: int = 99) -> list:
+    """
+    Get the projects for the given user whose ID or name starts with the query
+    Without a query, the most recently modified projects are returned
+    """
+    if not query:
+        return get_cached_user_projects(user)
+
+    return frappe.get_list(
+        "Project",
+        filters={"status": "Open"},
+        or_filters={
+            "project_name": ["like", f"{query}%"],
+            "name": ["like", f"{query}%"],
+        },
+        fields=["name", "project_name"],
+        order_by="modified desc",
+        limit=limit,
+    )
+
+
+def search_user_tasks(user: str, query: str | None = None, project: str | None = None, limit: int = 99) -> list:
+    """
+    Get the tasks for the given user (and project) whose ID or subject starts with the query
+    Without a query, the most recently modified tasks are returned
+    """
+    if not query:
+        return get_cached_user_tasks(user, project)
+
+    filters = {"status": ["not in", ["Completed", "Cancelled"]]}
+    if project:
+        filters["project"] = project
+
+    return frappe.get_list(
+        "Task",
+        filters=filters,
+        or_filters={
+            "subject": ["like", f"{query}%"],
+            "name": ["like", f"{query}%"],
+        },
+        fields=["name", "subject"],
+        order_by="modified desc",
+        limit=limit,
+    )
+
+
+def get_cached_user_projects(user: str) -> list:
+    """
+    Get the projects for the given user, cached for a few minutes
+    """
+    return get_cached_timesheet_options("projects", user, lambda: get_user_projects(user))
+
+
+def get_cached_user_tasks(user: str, project: str | None = None) -> list:
+    """
+    Get the tasks for the given user (and project), cached for a few minutes
+    """
+    return get_cached_timesheet_options(f"tasks:{project or ''}", user, lambda: get_user_tasks(user, project))
+
+
+def get_cached_timesheet_options(kind: str, user: str, generator) -> list:
+    """
+    Get the timesheet select options of the given kind for the user from the cache
+    The options are fetched with the permissions of the user, so they are cached
+    per user. Cached options expire after a short while, and are cleared whenever
+    a Project or Task they may include is changed
+    """
+    key = f"{TIMESHEET_OPTIONS_CACHE_KEY}:{kind}"
+    cached = frappe.cache.hget(key, user)
+    if cached and cached["expires_at"] > time.time():
+        return cached["options"]
+
+    options = generator()
+    frappe.cache.hset(
+        key,
+        user,
+        {"expires_at": time.time() + TIMESHEET_OPTIONS_CACHE_TTL, "options": options},
+    )
+    return options
+
+
+def clear_timesheet_options_cache(doc: Document, method: str | None = None) -> None:
     """
-    Get the working hours and frequency for the given employee
+    Clear the cached timesheet options which may include the changed Project or Task
+    i.e. the project options, or the task options of its (previous) project and of all projects
+    The options depend on the permissions of each user, so they are cleared for all the users
     """
-    if not employee:
-        employee = get_employee_from_user()
+    if doc.doctype == "Project":
+        kinds = ["projects"]
+    else:
+        doc_before_save = doc.get_doc_before_save()
+        projects = {None, doc.project, doc_before_save.project if doc_before_save else None}
+        kinds = [f"tasks:{project or ''}" for project in projects]
 
+    for kind in kinds:
+        frappe.cache.delete_value(f"{TIMESHEET_OPTIONS_CACHE_KEY}:{kind}")
+
+
+def get_daily_working_norm(employee: dict, standard_working_hours: float | None = None) -> float:
+    """
+    Get the daily working norm from the given Employee row
+    The custom working hours from the row are only used if next_pms is installed,
+    otherwise the standard working hours from the HR Settings apply
+    """
     working_hour = None
     working_frequency = None
     if is_next_pms_installed():
-        working_hour, working_frequency = frappe.get_value(
-            "Employee",
-            employee,
-            ["custom_working_hours", "custom_work_schedule"],
-        )
+        working_hour = employee.get("custom_working_hours")
+        working_frequency = employee.get("custom_work_schedule")
     if not working_hour:
-        working_hour = frappe.db.get_single_value("HR Settings", "standard_working_hours")
-    if not working_frequency:
-        working_frequency = "Per Day"
-
-    return {"working_hour": working_hour or 8, "working_frequency": working_frequency}
+        working_hour = standard_working_hours or 8
+    if working_frequency and working_frequency != "Per Day":
+        return working_hour / 5
+    return working_hour
 
 
 def get_employee_daily_working_norm(employee: str) -> int:
     """
     Get the daily working norm for the given employee
     """
-    working_details = get_employee_working_hours(employee)
-    if working_details.get("working_frequency") != "Per Day":
-        return working_details.get("working_hour") / 5
-    return working_details.get("working_hour")
+    return get_employees_daily_working_norm([employee])[employee]
+
+
+def get_employees_daily_working_norm(employees: list) -> dict:
+    """
+    Get the daily working norm for each of the given employees in a single query
+    The standard working hours from the HR Settings are read once for all the employees,
+    and apply to the employees without custom working hours (or not found)
+    """
+    if not employees:
+        return {}
+
+    standard_working_hours = frappe.db.get_single_value("HR Settings", "standard_working_hours")
+    working_norms = dict.fromkeys(employees, get_daily_working_norm({}, standard_working_hours))
+
+    fields = ["name"]
+    if is_next_pms_installed():
+        fields.extend(["custom_working_hours", "custom_work_schedule"])
+
+    rows = frappe.get_all(
+        "Employee",
+        filters={"name": ["in", list(set(employees))]},
+        fields=fields,
+    )
+    for row in rows:
+        working_norms[row.name] = get_daily_working_norm(row, standard_working_hours)
+    return working_norms
 
 
 def get_reported_time_by_employee(employee: str, date: datetime.date) -> int:
     """
     Get the total reported time by the employee for the given date
     """
-    if_exists = frappe.db.exists(
-        "Timesheet",
-        {
-            "employee": employee,
-            "start_date": date,
-        },
-    )
-    if not if_exists:
-        return 0
-
-    timesheets = frappe.get_all(
-        "Timesheet",
-        filters={
-            "employee": employee,
-            "start_date": date,
-            "end_date": date,
-        },
-        fields=["total_hours"],
-    )
-    total_hours = 0
-    for timesheet in timesheets:
-        total_hours += timesheet.total_hours
-    return total_hours
+    return get_reported_time_by_employees([employee], date)[employee]
+
+
+def get_reported_time_by_employees(employees: list, date: datetime.date) -> dict:
+    """
+    Get the total reported time by each of the given employees for the given date
+    """
+    reported_time = get_reported_time(employees, date, date)
+    return {employee: reported_time.get((employee, getdate(date)), 0) for employee in employees}
+
+
+def get_reported_time(employees: list, from_date: datetime.date, to_date: datetime.date) -> dict:
+    """
+    Get the total reported time by the given employees for each date of the range
+    in a single aggregated query over the daily timesheets
+    Returns a dict keyed by (employee, date), only for the dates with a timesheet
+    """
+    if not employees:
+        return {}
+
+    Timesheet = frappe.qb.DocType("Timesheet")
+    rows = (
+        frappe.qb.from_(Timesheet)
+        .select(
+            Timesheet.employee,
+            Timesheet.start_date,
+            Sum(Timesheet.total_hours).as_("total_hours"),
+        )
+        .where(
+            Timesheet.employee.isin(list(set(employees)))
+            & Timesheet.start_date.between(getdate(from_date), getdate(to_date))
+            & (Timesheet.end_date == Timesheet.start_date)
+        )
+        .groupby(Timesheet.employee, Timesheet.start_date)
+    ).run(as_dict=True)
+
+    return {(row.employee, row.start_date): row.total_hours or 0 for row in rows}
 
 
 def create_timesheet_detail(
@@ -161,5 +297,4 @@ def is_next_pms_installed() -> bool:
     Check if the custom fields for timesheet doctype exists
     These fields are taken from the frappe_pms app if installed
     """
-    installed_apps = frappe.get_installed_apps()
-    return "next_pms" in installed_apps
+    return has_capability("next_pms")
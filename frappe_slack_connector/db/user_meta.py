@@ -2,6 +2,8 @@ import frappe
 
 from frappe_slack_connector.helpers.error import generate_error_log
 
+SLACK_IDENTITY_CACHE_KEY = "slack_identity"
+
 
 def update_user_meta(user_meta_object: dict, user: str | None = None, upsert: bool = True) -> object:
     """
@@ -30,41 +32,198 @@ def update_user_meta(user_meta_object: dict, user: str | None = None, upsert: bo
     return user_meta
 
 
-def get_user_meta(*, user_id: str | None = None, employee_id: str | None = None) -> dict | None:
+def bulk_update_user_meta(slack_users: dict, batch_size: int = 500) -> frappe._dict:
     """
-    Get the User Meta document for the given user or employee.
+    Reconcile the User Meta documents with the given Slack users in bulk.
+    `slack_users` maps the user email to the Slack details (`id`, `name` and `tz`).
+    Only the new and changed rows are written, committing once per batch.
+    Returns the count of inserted, updated and unchanged rows, along with
+    the emails which are not found as users in ERPNext.
     """
-    try:
-        if not user_id and not employee_id:
-            raise ValueError("Either user_id or employee_id is required")
-        if user_id and employee_id:
-            raise ValueError("Only one of user_id or employee_id is required")
-
-        user_meta = None
-        if user_id:
-            user_meta = frappe.get_doc("User Meta", {"user": user_id})
+    result = frappe._dict(inserted=0, updated=0, unchanged=0, not_found=[])
+    if not slack_users:
+        return result
+
+    # The database matches the emails case-insensitively, so match them lower-cased here too
+    existing_users = {
+        user.lower(): user for user in frappe.get_all("User", filters={"name": ["in", list(slack_users)]}, pluck="name")
+    }
+    user_metas = {}
+    if existing_users:
+        user_metas = {
+            user_meta.user.lower(): user_meta
+            for user_meta in frappe.get_all(
+                "User Meta",
+                filters={"user": ["in", list(existing_users.values())]},
+                fields=["name", "user", "custom_slack_userid", "custom_slack_username", "custom_slack_timezone"],
+            )
+        }
+
+    to_insert = []
+    to_update = {}
+    for email, slack_details in slack_users.items():
+        user = existing_users.get(email.lower())
+        if user is None:
+            result.not_found.append(email)
+            continue
+
+        values = {
+            "custom_slack_userid": slack_details["id"],
+            "custom_slack_username": slack_details["name"],
+            "custom_slack_timezone": slack_details.get("tz"),
+        }
+        user_meta = user_metas.get(email.lower())
+        if user_meta is None:
+            to_insert.append((user, values))
+        elif any(user_meta.get(field) != value for field, value in values.items()):
+            to_update[user_meta.name] = values
         else:
-            employee_email = frappe.get_value("Employee", employee_id, "user_id")
-            if employee_email:
-                user_meta = frappe.get_doc("User Meta", {"user": employee_email})
-        return user_meta
-    except Exception as e:
-        generate_error_log(
-            title="Error getting User Meta",
-            message="Please check the user ID or employee ID and try again.",
-            exception=e,
+            result.unchanged += 1
+
+    now = frappe.utils.now()
+    for i in range(0, len(to_insert), batch_size):
+        batch = to_insert[i : i + batch_size]
+        frappe.db.bulk_insert(
+            "User Meta",
+            fields=[
+                "name",
+                "user",
+                "custom_slack_userid",
+                "custom_slack_username",
+                "custom_slack_timezone",
+                "owner",
+                "modified_by",
+                "creation",
+                "modified",
+            ],
+            values=[
+                (
+                    user,
+                    user,
+                    values["custom_slack_userid"],
+                    values["custom_slack_username"],
+                    values["custom_slack_timezone"],
+                    frappe.session.user,
+                    frappe.session.user,
+                    now,
+                    now,
+                )
+                for user, values in batch
+            ],
+        )
+        frappe.db.commit()  # commit the changes // nosemgrep
+        result.inserted += len(batch)
+
+    updates = list(to_update.items())
+    for i in range(0, len(updates), batch_size):
+        batch = dict(updates[i : i + batch_size])
+        frappe.db.bulk_update("User Meta", batch)
+        frappe.db.commit()  # commit the changes // nosemgrep
+        result.updated += len(batch)
+
+    # Bulk writes skip the document hooks, so clear the Slack ID mapping here
+    if to_insert or to_update:
+        clear_slack_identity_cache()
+
+    return result
+
+
+def get_slack_details(*, employee_ids: list | None = None, user_ids: list | None = None) -> dict:
+    """
+    Get the Slack details for the given employees or users in a single query.
+    Returns a dict keyed by the given employee or user IDs, with the `employee`,
+    `employee_name`, `user`, `slack_id` and `slack_name` for each ID found.
+    The `slack_id` and `slack_name` are None if the user is not linked to Slack.
+    """
+    if employee_ids is None and user_ids is None:
+        raise ValueError("Either employee_ids or user_ids is required")
+    if employee_ids is not None and user_ids is not None:
+        raise ValueError("Only one of employee_ids or user_ids is required")
+    if not employee_ids and not user_ids:
+        return {}
+
+    Employee = frappe.qb.DocType("Employee")
+    UserMeta = frappe.qb.DocType("User Meta")
+
+    if employee_ids:
+        query = (
+            frappe.qb.from_(Employee)
+            .left_join(UserMeta)
+            .on(UserMeta.user == Employee.user_id)
+            .select(Employee.name.as_("key"), Employee.user_id.as_("user"))
+            .where(Employee.name.isin(list(set(employee_ids))))
         )
+    else:
+        query = (
+            frappe.qb.from_(UserMeta)
+            .left_join(Employee)
+            .on(Employee.user_id == UserMeta.user)
+            .select(UserMeta.user.as_("key"), UserMeta.user.as_("user"))
+            .where(UserMeta.user.isin(list(set(user_ids))))
+        )
+
+    rows = query.select(
+        Employee.name.as_("employee"),
+        Employee.employee_name,
+        UserMeta.custom_slack_userid.as_("slack_id"),
+        UserMeta.custom_slack_username.as_("slack_name"),
+    ).run(as_dict=True)
+
+    return {row.pop("key"): row for row in rows}
+
+
+def get_slack_identity(slack_user_id: str) -> frappe._dict | None:
+    """
+    Get the Frappe User ID and Employee ID for the given Slack User ID.
+    Served from the request cache, backed by a Redis hash which is cleared
+    whenever the User Meta or the user of an Employee changes.
+    """
+    if not slack_user_id:
         return None
 
+    return frappe.local_cache(
+        SLACK_IDENTITY_CACHE_KEY,
+        slack_user_id,
+        lambda: frappe.cache.hget(
+            SLACK_IDENTITY_CACHE_KEY,
+            slack_user_id,
+            generator=lambda: _get_slack_identity(slack_user_id),
+        ),
+    )
+
 
-def get_userid_from_slackid(slack_user_id: str) -> str | None:
+def _get_slack_identity(slack_user_id: str) -> frappe._dict | None:
+    """
+    Get the Frappe User ID and Employee ID for the given Slack User ID from the database
+    """
+    Employee = frappe.qb.DocType("Employee")
+    UserMeta = frappe.qb.DocType("User Meta")
+    identity = (
+        frappe.qb.from_(UserMeta)
+        .left_join(Employee)
+        .on(Employee.user_id == UserMeta.user)
+        .select(UserMeta.user, Employee.name.as_("employee"))
+        .where(UserMeta.custom_slack_userid == slack_user_id)
+        .limit(1)
+    ).run(as_dict=True)
+    return identity[0] if identity else None
+
+
+def clear_slack_identity_cache() -> None:
+    """
+    Clear the cached Slack User ID to Frappe User and Employee mapping
+    """
+    frappe.cache.delete_value(SLACK_IDENTITY_CACHE_KEY)
+
+
+def get_userid_from_slackid(slack_user_id: str) -> str:
     """
     Get the Frappe User ID for the given Slack User ID.
     """
-    user_meta = frappe.get_doc("User Meta", {"custom_slack_userid": slack_user_id})
-    if not user_meta or not user_meta.user:
-        return None
-    return user_meta.user
+    identity = get_slack_identity(slack_user_id)
+    if not identity or not identity.user:
+        frappe.throw(frappe._("User not found for the Slack user {0}").format(slack_user_id), frappe.DoesNotExistError)
+    return identity.user
 
 
 def get_employeeid_from_slackid(slack_user_id: str) -> str | None:
@@ -72,12 +231,10 @@ def get_employeeid_from_slackid(slack_user_id: str) -> str | None:
     Get the Employee ID for the given Slack User ID.
     """
     try:
-        userid = get_userid_from_slackid(slack_user_id)
-        if userid is None:
+        identity = get_slack_identity(slack_user_id)
+        if identity is None:
             return None
-        # get the employee id from employee doctype
-        employee_id = frappe.get_value("Employee", {"user_id": userid}, "name")
-        return employee_id
+        return identity.employee
     except Exception as e:
         generate_error_log(
             title="Error getting Employee ID",
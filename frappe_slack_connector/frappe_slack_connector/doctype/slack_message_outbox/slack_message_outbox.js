@@ -0,0 +1,12 @@
+// Copyright (c) 2026, rtCamp and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("Slack Message Outbox", {
+  refresh: function (frm) {
+    if (frm.doc.status === "Failed") {
+      frm.add_custom_button(__("Retry"), () => {
+        frm.call("retry").then(() => frm.reload_doc());
+      });
+    }
+  },
+});
@@ -0,0 +1,31 @@
+# Copyright (c) 2026, rtCamp and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Interval
+from frappe.query_builder.functions import Now
+
+from frappe_slack_connector.slack.outbox import enqueue_drain
+
+
+class SlackMessageOutbox(Document):
+    @frappe.whitelist()
+    def retry(self):
+        """
+        Queue the failed message to be sent again
+        """
+        self.db_set({"status": "Queued", "attempts": 0, "next_attempt_at": frappe.utils.now_datetime()})
+        enqueue_drain()
+
+    @staticmethod
+    def clear_old_logs(days: int = 30):
+        """
+        Delete the sent messages older than the given number of days
+        Called by the Log Settings cleanup job
+        """
+        table = frappe.qb.DocType("Slack Message Outbox")
+        frappe.db.delete(
+            table,
+            filters=(table.status == "Sent") & (table.modified < (Now() - Interval(days=days))),
+        )
@@ -0,0 +1,121 @@
+# Copyright (c) 2026, rtCamp and Contributors
+# See license.txt
+
+import json
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now_datetime
+
+from frappe_slack_connector.slack.outbox import (
+    OUTBOX_DOCTYPE,
+    claim_due_messages,
+    deliver_messages,
+    drain_outbox,
+    queue_messages,
+)
+
+
+class TestSlackMessageOutbox(FrappeTestCase):
+    def setUp(self):
+        # Nothing is sent to Slack from the tests
+        for target in ("enqueue_drain", "deliver_messages"):
+            patcher = patch(f"frappe_slack_connector.slack.outbox.{target}")
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+
+        self.key = f"test-outbox:{frappe.generate_hash(length=10)}"
+        self.addCleanup(self.delete_test_messages)
+
+    def delete_test_messages(self):
+        frappe.db.delete(OUTBOX_DOCTYPE, {"idempotency_key": ["like", f"{self.key}%"]})
+        frappe.db.commit()  # nosemgrep
+
+    def get_names(self) -> list:
+        return frappe.get_all(OUTBOX_DOCTYPE, filters={"idempotency_key": ["like", f"{self.key}%"]}, pluck="name")
+
+    def test_queue_messages_skips_duplicate_keys(self):
+        queue_messages([{"channel": "C123", "text": "First", "idempotency_key": self.key}])
+        queue_messages([{"channel": "C123", "text": "Second", "idempotency_key": self.key}])
+
+        payloads = frappe.get_all(OUTBOX_DOCTYPE, filters={"idempotency_key": self.key}, pluck="payload")
+        self.assertEqual(len(payloads), 1)
+        self.assertEqual(json.loads(payloads[0])["text"], "First")
+        self.enqueue_drain.assert_called()
+
+    def test_queue_messages_keeps_distinct_keys(self):
+        queue_messages(
+            [
+                {"channel": "C123", "text": "First", "idempotency_key": f"{self.key}:1"},
+                {"channel": "C123", "text": "Second", "idempotency_key": f"{self.key}:2"},
+            ]
+        )
+
+        self.assertEqual(frappe.db.count(OUTBOX_DOCTYPE, {"idempotency_key": ["like", f"{self.key}%"]}), 2)
+
+    def test_deliver_now_returns_the_existing_message_for_duplicates(self):
+        queue_messages([{"channel": "C123", "text": "First", "idempotency_key": self.key}])
+        frappe.db.set_value(OUTBOX_DOCTYPE, {"idempotency_key": self.key}, {"status": "Sent", "message_ts": "1.23"})
+
+        rows = queue_messages(
+            [{"channel": "C123", "text": "Second", "idempotency_key": self.key}],
+            deliver_now=True,
+        )
+
+        self.deliver_messages.assert_called_once_with([])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].status, "Sent")
+        self.assertEqual(rows[0].message_ts, "1.23")
+
+    def test_claimed_messages_are_held_back_for_the_lease(self):
+        queue_messages([{"channel": "C123", "text": "First", "idempotency_key": self.key}])
+        name = frappe.db.get_value(OUTBOX_DOCTYPE, {"idempotency_key": self.key})
+
+        self.assertIn(name, [row.name for row in claim_due_messages()])
+        self.assertGreater(frappe.db.get_value(OUTBOX_DOCTYPE, name, "next_attempt_at"), now_datetime())
+        self.assertNotIn(name, [row.name for row in claim_due_messages()])
+
+    def test_messages_due_later_are_not_claimed(self):
+        queue_messages([{"channel": "C123", "text": "First", "idempotency_key": self.key}], deliver_now=True)
+        name = frappe.db.get_value(OUTBOX_DOCTYPE, {"idempotency_key": self.key})
+
+        # Messages sent right away are leased to the sender, until it records the result
+        self.assertNotIn(name, [row.name for row in claim_due_messages()])
+
+    def test_drain_claims_until_nothing_is_due(self):
+        # Messages queued while the drain runs don't enqueue another drain
+        batches = [[frappe._dict(name="first")], [frappe._dict(name="second")], []]
+        with patch("frappe_slack_connector.slack.outbox.claim_due_messages", side_effect=batches):
+            drain_outbox()
+
+        self.assertEqual(self.deliver_messages.call_count, 2)
+
+    def test_deliver_messages_records_each_result(self):
+        queue_messages(
+            [
+                {"channel": "C123", "text": "First", "idempotency_key": f"{self.key}:1"},
+                {"channel": "C123", "text": "Second", "idempotency_key": f"{self.key}:2"},
+            ]
+        )
+        rows = [row for row in claim_due_messages() if row.name in self.get_names()]
+
+        sender = MagicMock()
+        sender.return_value.iter_send.return_value = [
+            (0, frappe._dict(ok=True, response={"ts": "1.23"}, error=None)),
+            (1, frappe._dict(ok=False, response=None, error=Exception("rate_limited"))),
+        ]
+        with (
+            patch("frappe_slack_connector.slack.outbox.SlackMessageSender", sender),
+            patch("frappe_slack_connector.slack.outbox.get_slack_integration"),
+        ):
+            deliver_messages(rows)
+
+        sent = frappe.db.get_value(OUTBOX_DOCTYPE, rows[0].name, ["status", "message_ts", "attempts"], as_dict=True)
+        self.assertEqual((sent.status, sent.message_ts, sent.attempts), ("Sent", "1.23", 1))
+
+        failed = frappe.db.get_value(
+            OUTBOX_DOCTYPE, rows[1].name, ["status", "last_error", "next_attempt_at"], as_dict=True
+        )
+        self.assertEqual((failed.status, failed.last_error), ("Queued", "rate_limited"))
+        self.assertGreater(failed.next_attempt_at, now_datetime())
@@ -0,0 +1,21 @@
+# Copyright (c) 2026, rtCamp and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Interval
+from frappe.query_builder.functions import Now
+
+
+class SlackReminderRun(Document):
+    @staticmethod
+    def clear_old_logs(days: int = 30):
+        """
+        Delete the finished reminder runs older than the given number of days
+        Called by the Log Settings cleanup job
+        """
+        table = frappe.qb.DocType("Slack Reminder Run")
+        frappe.db.delete(
+            table,
+            filters=(table.status != "In Progress") & (table.modified < (Now() - Interval(days=days))),
+        )
@@ -0,0 +1,89 @@
+# Copyright (c) 2026, rtCamp and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate
+
+from frappe_slack_connector.tasks.send_daily_reminder import (
+    REMINDER_MAX_ATTEMPTS,
+    REMINDER_RUN_DOCTYPE,
+    complete_reminder_shard,
+    retry_reminder_run,
+    start_reminder_run,
+)
+
+
+class TestSlackReminderRun(FrappeTestCase):
+    def setUp(self):
+        # Nothing is sent to Slack from the tests
+        patcher = patch("frappe_slack_connector.tasks.send_daily_reminder.frappe.enqueue")
+        self.enqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.run_key = f"Test/Timezone:{frappe.generate_hash(length=10)}"
+        self.addCleanup(self.delete_test_runs)
+
+    def delete_test_runs(self):
+        frappe.db.delete(REMINDER_RUN_DOCTYPE, {"run_key": self.run_key})
+        frappe.db.commit()  # nosemgrep
+
+    def start_run(self, employee_count: int):
+        employees = [f"EMP-{index}" for index in range(employee_count)]
+        start_reminder_run(self.run_key, "Reminder", employees, "Test/Timezone", getdate("2024-09-17"))
+        return frappe.get_last_doc(REMINDER_RUN_DOCTYPE, filters={"run_key": self.run_key})
+
+    def test_run_without_employees_is_completed(self):
+        run = self.start_run(0)
+
+        self.assertEqual(run.status, "Completed")
+        self.enqueue.assert_not_called()
+
+    def test_run_is_completed_once_every_shard_completes(self):
+        with patch("frappe_slack_connector.tasks.send_daily_reminder.REMINDER_SHARD_SIZE", 2):
+            run = self.start_run(5)
+
+        self.assertEqual((run.expected_shards, run.pending_shards), (3, "0,1,2"))
+        self.assertEqual(sorted(call.kwargs["shard"] for call in self.enqueue.call_args_list), [0, 1, 2])
+        self.assertEqual(sum(len(call.kwargs["employees"]) for call in self.enqueue.call_args_list), 5)
+
+        complete_reminder_shard(run.name, 1)
+        complete_reminder_shard(run.name, 1)
+        run.reload()
+        self.assertEqual((run.status, run.completed_shards, run.pending_shards), ("In Progress", 1, "0,2"))
+
+        complete_reminder_shard(run.name, 0)
+        complete_reminder_shard(run.name, 2)
+        run.reload()
+        self.assertEqual((run.status, run.completed_shards), ("Completed", 3))
+
+    def test_retry_enqueues_only_the_pending_shards(self):
+        with patch("frappe_slack_connector.tasks.send_daily_reminder.REMINDER_SHARD_SIZE", 2):
+            run = self.start_run(5)
+        complete_reminder_shard(run.name, 0)
+        self.enqueue.reset_mock()
+
+        retry_reminder_run(
+            frappe.get_all(REMINDER_RUN_DOCTYPE, filters={"name": run.name}, fields="*")[0],
+            "Reminder",
+            [f"EMP-{index}" for index in range(5)],
+        )
+
+        self.assertEqual(sorted(call.kwargs["shard"] for call in self.enqueue.call_args_list), [1, 2])
+        self.assertEqual(frappe.db.get_value(REMINDER_RUN_DOCTYPE, run.name, "attempts"), 2)
+
+    def test_run_fails_once_the_attempts_run_out(self):
+        run = self.start_run(1)
+        frappe.db.set_value(REMINDER_RUN_DOCTYPE, run.name, "attempts", REMINDER_MAX_ATTEMPTS)
+        self.enqueue.reset_mock()
+
+        retry_reminder_run(
+            frappe.get_all(REMINDER_RUN_DOCTYPE, filters={"name": run.name}, fields="*")[0],
+            "Reminder",
+            ["EMP-0"],
+        )
+
+        self.assertEqual(frappe.db.get_value(REMINDER_RUN_DOCTYPE, run.name, "status"), "Failed")
+        self.enqueue.assert_not_called()
@@ -1,9 +1,13 @@
 # Copyright (c) 2024, rtCamp and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+from frappe_slack_connector.slack.app import clear_slack_integration_cache
+from frappe_slack_connector.tasks.attendance_summary import clear_next_run
+from frappe_slack_connector.tasks.leave_digest import clear_digest_due_at
+
 # TODO: Add validation for slack and channel integration
 # Currently we are taking the channel name (not the id), so it is
 # not possible to get the conversations.info api that expects a channel
@@ -20,3 +24,13 @@ class SlackSettings(Document):
         the slack_app_token and slack_bot_token from the document
         """
         pass
+
+    def on_update(self):
+        """
+        Rebuild the cached Slack Integration with the updated credentials
+        and recheck the attendance and digest schedules on the next tick
+        Cleared after the commit, so that the other workers don't cache the old settings again
+        """
+        frappe.db.after_commit.add(clear_slack_integration_cache)
+        frappe.db.after_commit.add(clear_next_run)
+        frappe.db.after_commit.add(clear_digest_due_at)
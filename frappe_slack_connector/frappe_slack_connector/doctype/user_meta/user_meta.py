@@ -4,6 +4,15 @@
 # import frappe
 from frappe.model.document import Document
 
+from frappe_slack_connector.db.user_meta import clear_slack_identity_cache
+
 
 class UserMeta(Document):
-    pass
+    def on_update(self):
+        """
+        Clear the cached Slack User ID mapping, the Slack user may have changed
+        """
+        clear_slack_identity_cache()
+
+    def on_trash(self):
+        clear_slack_identity_cache()
@@ -0,0 +1,63 @@
+import threading
+
+import frappe
+
+####################################################################
+#                                                                  #
+# Capabilities                                                     #
+# -----------------------------------------------------------------#
+# Feature probes (installed apps, custom fields) evaluated once per #
+# site in each worker, and invalidated on migrate or app install   #
+#                                                                  #
+####################################################################
+
+CAPABILITIES_VERSION_KEY = "slack_capabilities_version"
+
+CAPABILITY_PROBES = {
+    # rtCamp specific half day fields in the Leave Application
+    "leave_half_day_fields": lambda: frappe.get_meta("Leave Application").has_field("custom_first_halfsecond_half"),
+    # Timesheet and employee fields added by the Next PMS app
+    "next_pms": lambda: "next_pms" in frappe.get_installed_apps(),
+}
+
+# Per-worker cache of the probe results, keyed by site
+# Each entry holds the capabilities version it was evaluated for
+_capabilities: dict[str, tuple[str, dict]] = {}
+_capabilities_lock = threading.Lock()
+
+
+def has_capability(name: str) -> bool:
+    """
+    Check if the current site has the given capability
+    The probe runs once per site in the worker, the cached result is checked
+    against the capabilities version once per request
+    """
+    site = frappe.local.site
+    version = frappe.local_cache(
+        CAPABILITIES_VERSION_KEY,
+        site,
+        lambda: frappe.cache.get_value(CAPABILITIES_VERSION_KEY, generator=frappe.generate_hash),
+    )
+
+    cached = _capabilities.get(site)
+    if not cached or cached[0] != version:
+        with _capabilities_lock:
+            cached = _capabilities.get(site)
+            if not cached or cached[0] != version:
+                cached = (version, {})
+                _capabilities[site] = cached
+
+    capabilities = cached[1]
+    if name not in capabilities:
+        capabilities[name] = bool(CAPABILITY_PROBES[name]())
+    return capabilities[name]
+
+
+def clear_capabilities(*args, **kwargs) -> None:
+    """
+    Invalidate the capabilities of the current site in all the workers
+    Hooked to migrate, app install and uninstall, and custom field changes
+    """
+    _capabilities.pop(frappe.local.site, None)
+    frappe.cache.delete_value(CAPABILITIES_VERSION_KEY)
+    frappe.local.cache.pop(CAPABILITIES_VERSION_KEY, None)
@@ -0,0 +1,97 @@
+import functools
+from contextlib import contextmanager
+
+import frappe
+from redis.exceptions import LockError
+
+####################################################################
+#                                                                  #
+# Run Lock                                                         #
+# -----------------------------------------------------------------#
+# Makes sure each logical run of a scheduled task (e.g. the        #
+# reminder of a day) happens once, even with multiple workers      #
+# A Redis lock keeps the runs from overlapping, and a ledger of    #
+# the last completed run of each task (saved in the database, so   #
+# it survives a Redis restart) skips the repeated runs             #
+#                                                                  #
+####################################################################
+
+RUN_LEDGER_KEY = "slack_task_run"
+RUN_LOCK_TIMEOUT = 60 * 60  # seconds
+
+
+@contextmanager
+def run_once(task: str, run_key: str, timeout: int = RUN_LOCK_TIMEOUT):
+    """
+    Context manager yielding whether the caller should perform the given run of the task
+    Yields False if the run is already done, or in progress in another worker
+    The run is recorded as done only if the block completes without an error,
+    otherwise it is retried on the next trigger
+    """
+    run_key = str(run_key)
+    if is_run_done(task, run_key):
+        yield False
+        return
+
+    with task_lock(task, timeout) as acquired:
+        # Check again with the lock held, another worker may have just completed the run
+        if not acquired or is_run_done(task, run_key):
+            yield False
+            return
+
+        yield True
+
+        # Commit the ledger before releasing the lock, so the next holder sees the run as done
+        frappe.db.set_global(f"{RUN_LEDGER_KEY}:{task}", run_key)
+        frappe.db.commit()  # nosemgrep
+
+
+@contextmanager
+def task_lock(task: str, timeout: int = RUN_LOCK_TIMEOUT):
+    """
+    Context manager yielding whether the lock of the task is acquired, without waiting for it
+    Keeps the runs of the task from overlapping across the workers
+    """
+    lock = frappe.cache.lock(frappe.cache.make_key(f"slack_task_lock:{task}"), timeout=timeout)
+    if not lock.acquire(blocking=False):
+        yield False
+        return
+
+    try:
+        yield True
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # The lock expired while running, nothing to release
+            pass
+
+
+def run_once_per_day(task: str):
+    """
+    Decorator to run the scheduled task at most once a day across the workers
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with run_once(task, frappe.utils.nowdate()) as should_run:
+                if should_run:
+                    return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def is_run_done(task: str, run_key: str) -> bool:
+    """
+    Check if the given run of the task is recorded as done in the ledger
+    Read from the database, and not the cached defaults, to see the runs just committed by other workers
+    """
+    last_run_key = frappe.db.get_value(
+        "DefaultValue",
+        {"parent": "__global", "defkey": f"{RUN_LEDGER_KEY}:{task}"},
+        "defvalue",
+    )
+    return last_run_key == run_key
@@ -0,0 +1,131 @@
+# Copyright (c) 2024, rtCamp and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate
+
+from frappe_slack_connector.helpers.work_calendar import WorkCalendar, get_daily_allocated_hours
+
+MONDAY = getdate("2024-09-16")
+
+
+def get_calendar(holidays: list, leaves: list) -> WorkCalendar:
+    """
+    Build a calendar for a single employee over the week, without the database
+    """
+    module = "frappe_slack_connector.helpers.work_calendar"
+    with (
+        patch(f"{module}.get_holiday_lists_for_employees", return_value={"EMP-1": "Holidays"}),
+        patch(f"{module}.get_holiday_dates", return_value={"Holidays": {getdate(date) for date in holidays}}),
+        patch(f"{module}.get_leave_applications", return_value=[frappe._dict(leave) for leave in leaves]),
+    ):
+        return WorkCalendar([frappe._dict(name="EMP-1")], MONDAY, getdate("2024-09-22"))
+
+
+def get_leave(from_date: str, to_date: str, half_day: bool = False) -> dict:
+    return {
+        "employee": "EMP-1",
+        "from_date": getdate(from_date),
+        "to_date": getdate(to_date),
+        "half_day": half_day,
+        "half_day_date": getdate(from_date) if half_day else None,
+    }
+
+
+class TestWorkCalendar(FrappeTestCase):
+    def test_days_off_without_holidays_or_leaves(self):
+        calendar = get_calendar(holidays=[], leaves=[])
+        self.assertEqual(calendar.get_days_off("EMP-1", MONDAY, 5), [False] * 5)
+
+    def test_days_off_marks_holidays_and_leaves(self):
+        calendar = get_calendar(
+            holidays=["2024-09-17"],
+            leaves=[get_leave("2024-09-19", "2024-09-19", half_day=True)],
+        )
+        self.assertEqual(calendar.get_days_off("EMP-1", MONDAY, 5), [False, True, False, True, False])
+
+    def test_days_off_clips_leaves_to_the_window(self):
+        calendar = get_calendar(
+            holidays=[],
+            leaves=[get_leave("2024-09-10", "2024-09-17"), get_leave("2024-09-20", "2024-09-27")],
+        )
+        self.assertEqual(calendar.get_days_off("EMP-1", MONDAY, 5), [True, True, False, False, True])
+
+    def test_days_off_of_overlapping_leaves(self):
+        calendar = get_calendar(
+            holidays=[],
+            leaves=[get_leave("2024-09-16", "2024-09-18"), get_leave("2024-09-17", "2024-09-17")],
+        )
+        self.assertEqual(calendar.get_days_off("EMP-1", MONDAY, 5), [True, True, True, False, False])
+
+    def test_days_off_of_other_employees(self):
+        calendar = get_calendar(holidays=["2024-09-17"], leaves=[get_leave("2024-09-16", "2024-09-20")])
+        self.assertEqual(calendar.get_days_off("EMP-2", MONDAY, 5), [False] * 5)
+
+
+class TestDailyAllocatedHours(FrappeTestCase):
+    def test_without_allocations(self):
+        self.assertEqual(get_daily_allocated_hours([], MONDAY, 5), [0] * 5)
+
+    def test_sums_overlapping_allocations(self):
+        allocations = [
+            {
+                "allocation_start_date": "2024-09-16",
+                "allocation_end_date": "2024-09-18",
+                "hours_allocated_per_day": 4,
+            },
+            {
+                "allocation_start_date": "2024-09-17",
+                "allocation_end_date": "2024-09-20",
+                "hours_allocated_per_day": 2.5,
+            },
+        ]
+        self.assertEqual(get_daily_allocated_hours(allocations, MONDAY, 5), [4, 6.5, 6.5, 2.5, 2.5])
+
+    def test_clips_allocations_to_the_window(self):
+        allocations = [
+            {
+                "allocation_start_date": "2024-09-01",
+                "allocation_end_date": "2024-09-16",
+                "hours_allocated_per_day": 8,
+            },
+            {
+                "allocation_start_date": "2024-09-20",
+                "allocation_end_date": "2024-10-31",
+                "hours_allocated_per_day": 3,
+            },
+            {
+                "allocation_start_date": "2024-09-23",
+                "allocation_end_date": "2024-09-27",
+                "hours_allocated_per_day": 5,
+            },
+        ]
+        self.assertEqual(get_daily_allocated_hours(allocations, MONDAY, 5), [8, 0, 0, 0, 3])
+
+    def test_rounds_off_floating_point_noise(self):
+        allocations = [
+            {
+                "allocation_start_date": "2024-09-16",
+                "allocation_end_date": "2024-09-16",
+                "hours_allocated_per_day": 0.1,
+            },
+            {
+                "allocation_start_date": "2024-09-16",
+                "allocation_end_date": "2024-09-17",
+                "hours_allocated_per_day": 0.2,
+            },
+        ]
+        self.assertEqual(get_daily_allocated_hours(allocations, MONDAY, 3), [0.3, 0.2, 0])
+
+    def test_missing_hours_count_as_zero(self):
+        allocations = [
+            {
+                "allocation_start_date": "2024-09-16",
+                "allocation_end_date": "2024-09-20",
+                "hours_allocated_per_day": None,
+            },
+        ]
+        self.assertEqual(get_daily_allocated_hours(allocations, MONDAY, 5), [0] * 5)
@@ -0,0 +1,103 @@
+from frappe.utils import add_days, datetime, getdate
+
+from frappe_slack_connector.db.employee import get_holiday_dates, get_holiday_lists_for_employees
+from frappe_slack_connector.db.leave_application import get_leave_applications
+
+
+class WorkCalendar:
+    """
+    Holidays and leaves of a set of employees over a date range
+    Built once per run with a handful of queries, and then answers
+    the working day checks for any employee and date in memory
+    """
+
+    def __init__(self, employees: list, from_date: datetime.date, to_date: datetime.date):
+        """
+        The employee rows are expected to have the `name`, `holiday_list` and `company` fields
+        """
+        self.from_date = getdate(from_date)
+        self.to_date = getdate(to_date)
+
+        self.holiday_lists = get_holiday_lists_for_employees(employees)
+        self.holiday_dates = get_holiday_dates(list(set(self.holiday_lists.values())), self.from_date, self.to_date)
+
+        self.leaves = {}
+        for leave in get_leave_applications([employee.name for employee in employees], self.from_date, self.to_date):
+            self.leaves.setdefault(leave.employee, []).append(leave)
+
+    def is_holiday(self, employee: str, date: datetime.date) -> bool:
+        """
+        Check if the date is in the holiday list of the employee
+        """
+        return date in self.holiday_dates.get(self.holiday_lists.get(employee), ())
+
+    def is_on_full_day_leave(self, employee: str, date: datetime.date) -> bool:
+        """
+        Check if the employee has a full day leave on the date
+        """
+        return any(
+            not leave.half_day and leave.from_date <= date <= leave.to_date for leave in self.leaves.get(employee, ())
+        )
+
+    def get_half_day_count(self, employee: str, date: datetime.date) -> int:
+        """
+        Get the number of half day leaves of the employee on the date
+        Two half days on the same date (first and second half) make a full day
+        """
+        return sum(1 for leave in self.leaves.get(employee, ()) if leave.half_day and leave.half_day_date == date)
+
+    def is_working_day(self, employee: str, date: datetime.date) -> bool:
+        """
+        Check if the date is a working day for the employee
+        i.e. neither a holiday nor a full day leave
+        """
+        return not (self.is_holiday(employee, date) or self.is_on_full_day_leave(employee, date))
+
+    def get_days_off(self, employee: str, start_date: datetime.date, days: int) -> list:
+        """
+        Get whether each day of the window starting at `start_date` is off for the
+        employee, i.e. a holiday or any leave (full or half day)
+        The leave intervals are marked with a difference array in a single pass
+        """
+        start_date = getdate(start_date)
+        leave_diff = [0] * (days + 1)
+        for leave in self.leaves.get(employee, ()):
+            start = max((leave.from_date - start_date).days, 0)
+            end = min((leave.to_date - start_date).days, days - 1)
+            if start > end:
+                continue
+            leave_diff[start] += 1
+            leave_diff[end + 1] -= 1
+
+        days_off = []
+        on_leave = 0
+        for i in range(days):
+            on_leave += leave_diff[i]
+            days_off.append(on_leave > 0 or self.is_holiday(employee, add_days(start_date, i)))
+        return days_off
+
+
+def get_daily_allocated_hours(allocations: list, start_date: datetime.date, days: int) -> list:
+    """
+    Get the total allocated hours for each day of the window starting at `start_date`
+    Built with a difference array, so it is a single pass over the allocations
+    no matter how many days the window spans
+    """
+    start_date = getdate(start_date)
+    diff = [0] * (days + 1)
+    for alloc in allocations:
+        start = max((getdate(alloc.get("allocation_start_date")) - start_date).days, 0)
+        end = min((getdate(alloc.get("allocation_end_date")) - start_date).days, days - 1)
+        if start > end:
+            continue
+        hours = alloc.get("hours_allocated_per_day") or 0
+        diff[start] += hours
+        diff[end + 1] -= hours
+
+    allocated_hours = []
+    total = 0
+    for i in range(days):
+        total += diff[i]
+        # Round off the floating point noise from adding and removing the hours
+        allocated_hours.append(round(total, 2))
+    return allocated_hours
@@ -91,6 +91,8 @@ fixtures = [
 # before_install = "frappe_slack_connector.install.before_install"
 # after_install = "frappe_slack_connector.install.after_install"
 
+after_migrate = "frappe_slack_connector.helpers.capabilities.clear_capabilities"
+
 # Uninstallation
 # ------------
 
@@ -103,7 +105,7 @@ fixtures = [
 # Name of the app being installed is passed as an argument
 
 # before_app_install = "frappe_slack_connector.utils.before_app_install"
-# after_app_install = "frappe_slack_connector.utils.after_app_install"
+after_app_install = "frappe_slack_connector.helpers.capabilities.clear_capabilities"
 
 # Integration Cleanup
 # -------------------
@@ -111,7 +113,7 @@ fixtures = [
 # Name of the app being uninstalled is passed as an argument
 
 # before_app_uninstall = "frappe_slack_connector.utils.before_app_uninstall"
-# after_app_uninstall = "frappe_slack_connector.utils.after_app_uninstall"
+after_app_uninstall = "frappe_slack_connector.helpers.capabilities.clear_capabilities"
 
 # Desk Notifications
 # ------------------
@@ -147,6 +149,22 @@ doc_events = {
     "Leave Application": {
         "after_insert": "frappe_slack_connector.override.leave_application.after_insert",
     },
+    "Employee": {
+        "on_update": "frappe_slack_connector.override.employee.on_update",
+        "on_trash": "frappe_slack_connector.override.employee.on_trash",
+    },
+    "Custom Field": {
+        "on_update": "frappe_slack_connector.helpers.capabilities.clear_capabilities",
+        "on_trash": "frappe_slack_connector.helpers.capabilities.clear_capabilities",
+    },
+    "Project": {
+        "on_update": "frappe_slack_connector.db.timesheet.clear_timesheet_options_cache",
+        "on_trash": "frappe_slack_connector.db.timesheet.clear_timesheet_options_cache",
+    },
+    "Task": {
+        "on_update": "frappe_slack_connector.db.timesheet.clear_timesheet_options_cache",
+        "on_trash": "frappe_slack_connector.db.timesheet.clear_timesheet_options_cache",
+    },
 }
 
 # Scheduled Tasks
@@ -160,9 +178,13 @@ scheduler_events = {
         "0 8 * * *": [
             "frappe_slack_connector.tasks.workload_reminder.send_daily_workload_reminder",
         ],
+        "*/5 * * * *": [
+            "frappe_slack_connector.slack.outbox.retry_due_messages",
+        ],
     },
     "all": [
         "frappe_slack_connector.tasks.attendance_summary.attendance_channel",
+        "frappe_slack_connector.tasks.leave_digest.send_leave_digests",
     ],
     "hourly": [
         "frappe_slack_connector.tasks.send_daily_reminder.send_reminder",
@@ -173,6 +195,15 @@ scheduler_events = {
     # "monthly": ["frappe_slack_connector.tasks.monthly"],
 }
 
+# Log Clearing
+# ------------
+# Sent messages are deleted from the outbox after the given number of days
+
+default_log_clearing_doctypes = {
+    "Slack Message Outbox": 30,
+    "Slack Reminder Run": 30,
+}
+
 # Testing
 # -------
 
@@ -199,7 +230,7 @@ scheduler_events = {
 # Ignore links to specified DocTypes when deleting documents
 # -----------------------------------------------------------
 
-# ignore_links_on_delete = ["Communication", "ToDo"]
+ignore_links_on_delete = ["Slack Message Outbox", "Slack Leave Digest Entry"]
 
 # Request Events
 # ----------------
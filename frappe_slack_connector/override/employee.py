@@ -0,0 +1,18 @@
+from frappe.model.document import Document
+
+from frappe_slack_connector.db.user_meta import clear_slack_identity_cache
+
+
+def on_update(doc: Document, method: str):
+    """
+    Clear the cached Slack User ID mapping when the user of the employee changes
+    """
+    if doc.has_value_changed("user_id"):
+        clear_slack_identity_cache()
+
+
+def on_trash(doc: Document, method: str):
+    """
+    Clear the cached Slack User ID mapping when an employee is deleted
+    """
+    clear_slack_identity_cache()
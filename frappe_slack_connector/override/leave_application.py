@@ -5,19 +5,33 @@ from frappe.utils import get_url_to_form
 from frappe_slack_connector.db.leave_application import custom_fields_exist
 from frappe_slack_connector.helpers.error import generate_error_log
 from frappe_slack_connector.helpers.standard_date import standard_date_fmt
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import get_slack_integration
+from frappe_slack_connector.slack.outbox import queue_messages
+from frappe_slack_connector.tasks.leave_digest import queue_leave_for_digest
 
 
 def after_insert(doc, method):
     """
     Send a slack message to the leave approver when a new leave application
     is submitted
+    In the digest mode, the application is queued for the approver's digest
+    instead, and the attendance thread is only notified for leaves starting today
     """
-    frappe.enqueue(
-        send_leave_notification_bg,
-        queue="short",
-        doc=doc,
-    )
+    if frappe.db.get_single_value("Slack Settings", "send_leave_approval_digest"):
+        queue_leave_for_digest(doc)
+        if str(doc.from_date) == frappe.utils.today():
+            frappe.enqueue(
+                send_leave_notification_bg,
+                queue="short",
+                doc=doc,
+                notify_approver=False,
+            )
+    else:
+        frappe.enqueue(
+            send_leave_notification_bg,
+            queue="short",
+            doc=doc,
+        )
     frappe.enqueue(
         send_leave_notification_to_applicant,
         queue="short",
@@ -27,21 +41,31 @@ def after_insert(doc, method):
 
 def send_leave_notification_to_applicant(doc: Document):
     # Send a confirmation message to the user
-    slack = SlackIntegration()
+    slack = get_slack_integration()
     user_id = slack.get_slack_user_id(employee_id=doc.employee)
-    slack.slack_app.client.chat_postMessage(
-        channel=user_id,
-        blocks=format_leave_submission_blocks(
-            leave_id=doc.name,
-            employee_name=doc.employee,
-            leave_link=get_url_to_form("Leave Application", doc.name),
-            leave_type=doc.leave_type,
-            leave_submission_date=doc.creation,
-            from_date=doc.from_date,
-            user_slack=user_id,
-            to_date=doc.to_date,
-            reason=doc.description,
-        ),
+    if not user_id:
+        return
+
+    queue_messages(
+        [
+            {
+                "channel": user_id,
+                "idempotency_key": f"leave-submitted:{doc.name}",
+                "blocks": format_leave_submission_blocks(
+                    leave_id=doc.name,
+                    employee_name=doc.employee,
+                    leave_link=get_url_to_form("Leave Application", doc.name),
+                    leave_type=doc.leave_type,
+                    leave_submission_date=doc.creation,
+                    from_date=doc.from_date,
+                    user_slack=user_id,
+                    to_date=doc.to_date,
+                    reason=doc.description,
+                ),
+            }
+        ],
+        reference_doctype=doc.doctype,
+        reference_name=doc.name,
     )
 
 
@@ -113,7 +137,7 @@ def format_leave_submission_blocks(
     return blocks
 
 
-def send_leave_notification_bg(doc: Document):
+def send_leave_notification_bg(doc: Document, notify_approver: bool = True):
     """
     Send a slack message to the leave approver when
     a new leave application is submitted
@@ -121,15 +145,16 @@ def send_leave_notification_bg(doc: Document):
     Also send a notification to the attendance channel thread if
     the leave date is today and attendance notification is already sent
     """
-    slack = SlackIntegration()
-    try:
-        approver_slack = slack.get_slack_user_id(user_email=doc.leave_approver)
-    except Exception as e:
-        generate_error_log(
-            title="Error fetching approver slack id",
-            exception=e,
-        )
-        approver_slack = None
+    slack = get_slack_integration()
+    approver_slack = None
+    if notify_approver:
+        try:
+            approver_slack = slack.get_slack_user_id(user_email=doc.leave_approver)
+        except Exception as e:
+            generate_error_log(
+                title="Error fetching approver slack id",
+                exception=e,
+            )
 
     try:
         user_slack = slack.get_slack_user_id(employee_id=doc.employee)
@@ -141,6 +166,7 @@ def send_leave_notification_bg(doc: Document):
 
         # if leave date is today and attendance notification is already sent,
         # send notification to attendance channel thread
+        messages = []
         slack_settings = frappe.get_single("Slack Settings")
         if (
             doc.from_date == frappe.utils.today()
@@ -149,39 +175,47 @@ def send_leave_notification_bg(doc: Document):
             and slack_settings.last_attendance_msg_ts is not None
             and slack_settings.last_attendance_date == frappe.utils.nowdate()
         ):
-            slack.slack_app.client.chat_postMessage(
-                channel=slack.SLACK_CHANNEL_ID,
-                blocks=[
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"{mention if mention_users else doc.employee_name} requested for leave today. "
-                            + f"_({day_period})_",
+            messages.append(
+                {
+                    "channel": slack.SLACK_CHANNEL_ID,
+                    "blocks": [
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": f"{mention if mention_users else doc.employee_name} requested for leave today. "
+                                + f"_({day_period})_",
+                            },
                         },
-                    },
-                ],
-                thread_ts=slack_settings.last_attendance_msg_ts,
-                reply_broadcast=True,
+                    ],
+                    "thread_ts": slack_settings.last_attendance_msg_ts,
+                    "reply_broadcast": True,
+                    "idempotency_key": f"leave-attendance-thread:{doc.name}",
+                }
             )
 
         # Send message to approver
         if approver_slack is not None:
-            slack.slack_app.client.chat_postMessage(
-                channel=approver_slack,
-                blocks=format_leave_application_blocks(
-                    leave_id=doc.name,
-                    leave_link=get_url_to_form("Leave Application", doc.name),
-                    employee_name=mention,
-                    leave_type=doc.leave_type,
-                    is_half_day=doc.half_day,
-                    leave_submission_date=standard_date_fmt(doc.creation),
-                    from_date=standard_date_fmt(doc.from_date),
-                    to_date=standard_date_fmt(doc.to_date),
-                    reason=doc.description,
-                ),
+            messages.append(
+                {
+                    "channel": approver_slack,
+                    "idempotency_key": f"leave-approval:{doc.name}",
+                    "blocks": format_leave_application_blocks(
+                        leave_id=doc.name,
+                        leave_link=get_url_to_form("Leave Application", doc.name),
+                        employee_name=mention,
+                        leave_type=doc.leave_type,
+                        is_half_day=doc.half_day,
+                        leave_submission_date=standard_date_fmt(doc.creation),
+                        from_date=standard_date_fmt(doc.from_date),
+                        to_date=standard_date_fmt(doc.to_date),
+                        reason=doc.description,
+                    ),
+                }
             )
 
+        queue_messages(messages, reference_doctype=doc.doctype, reference_name=doc.name)
+
     except Exception as e:
         generate_error_log(
             title="Error posting message to Slack",
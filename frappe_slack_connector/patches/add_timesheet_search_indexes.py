@@ -0,0 +1,9 @@
+import frappe
+
+
+def execute():
+    """
+    Add the indexes for the prefix search of projects and tasks in the timesheet modal
+    """
+    frappe.db.add_index("Project", ["project_name"])
+    frappe.db.add_index("Task", ["subject"])
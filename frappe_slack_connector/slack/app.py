@@ -1,8 +1,12 @@
+import threading
+import time
+
 import frappe
 from frappe import _
 from slack_bolt import App
+from slack_sdk.errors import SlackApiError
 
-from frappe_slack_connector.db.user_meta import get_user_meta
+from frappe_slack_connector.db.user_meta import get_slack_details
 from frappe_slack_connector.helpers.error import generate_error_log
 
 ####################################################################
@@ -14,6 +18,13 @@ from frappe_slack_connector.helpers.error import generate_error_log
 #                                                                  #
 ####################################################################
 
+SLACK_INTEGRATION_VERSION_KEY = "slack_integration_version"
+
+# Per-worker cache of the Slack Integration instances, keyed by site
+# Each entry holds the settings version it was built for
+_slack_integrations: dict[str, tuple[str, "SlackIntegration"]] = {}
+_slack_integrations_lock = threading.Lock()
+
 
 class SlackIntegration:
     SLACK_CHAR_LIMIT = 75
@@ -27,6 +38,7 @@ class SlackIntegration:
         self.SLACK_APP_TOKEN = settings.get_password("slack_app_token")
         self.SLACK_CHANNEL_ID = settings.get_password("attendance_channel_id")
         self.SLACK_SIGNATURE = settings.get_password("slack_signing_token")
+        self.process_interactions_in_background = bool(settings.process_interactions_in_background)
 
         # Still not set, raise an error
         if not self.__check_slack_config():
@@ -46,47 +58,62 @@ class SlackIntegration:
             if slack_attr.startswith("SLACK_")
         )
 
+    @staticmethod
+    def get_member_details(user: dict) -> tuple[str, dict] | None:
+        """
+        Get the email and Slack details for the given Slack member object
+        Returns None for deleted users, bots and app users, or if the email is not shared
+        """
+        email = user.get("profile", {}).get("email")
+        if email is None or user.get("deleted") or user.get("is_bot") or user.get("is_app_user"):
+            return None
+        return email, {
+            "id": user["id"],
+            "name": user["name"],
+            "real_name": user.get("real_name"),
+            "tz": user.get("tz"),
+        }
+
     def get_slack_users(self, limit: int = 500) -> dict:
         """
         Get all users from Slack and return a dictionary of email and username
-        This function uses pagination to handle large numbers of users
+        Prefer `iter_slack_users` to process large workspaces page by page
         """
         user_dict = {}
-        cursor = None
+        for users, _cursor in self.iter_slack_users(limit=limit):
+            user_dict.update(users)
+        return user_dict
 
+    def iter_slack_users(self, limit: int = 500, cursor: str | None = None, max_retries: int = 5):
+        """
+        Iterate over the Slack users page by page, starting from the given cursor
+        Yields the users of each page (email and Slack details) along with the cursor
+        of the next page, so that the caller can checkpoint its progress
+        Rate limited pages are retried with backoff, any other error is raised
+        """
         while True:
-            try:
-                # Make API call with cursor if it exists
-                if cursor:
+            for attempt in range(max_retries + 1):
+                try:
                     result = self.slack_app.client.users_list(limit=limit, cursor=cursor)
-                else:
-                    result = self.slack_app.client.users_list(limit=limit)
-
-                users = result.get("members", [])
-
-                for user in users:
-                    email = user.get("profile", {}).get("email")
-                    if email is None or user["deleted"] or user["is_bot"] or user["is_app_user"]:
-                        continue
-                    user_dict[email] = {
-                        "id": user["id"],
-                        "name": user["name"],
-                        "real_name": user["real_name"],
-                    }
-
-                # Check if there are more users to fetch
-                cursor = result.get("response_metadata", {}).get("next_cursor")
-                if not cursor:
-                    break  # No more users to fetch
-
-            except Exception as e:
-                generate_error_log(
-                    title="Error fetching Slack users",
-                    exception=e,
-                )
-                break  # Exit the loop if there's an error
-
-        return user_dict
+                    break
+                except SlackApiError as e:
+                    if e.response.status_code != 429 or attempt == max_retries:
+                        raise
+                    time.sleep(max(get_retry_after(e.response.headers), 2**attempt))
+
+            users = {}
+            for user in result.get("members", []):
+                member = self.get_member_details(user)
+                if member is None:
+                    continue
+                email, details = member
+                users[email] = details
+
+            # Check if there are more users to fetch
+            cursor = result.get("response_metadata", {}).get("next_cursor")
+            yield users, cursor
+            if not cursor:
+                return  # No more users to fetch
 
     def get_slack_user(
         self,
@@ -106,30 +133,23 @@ class SlackIntegration:
             raise ValueError("Only one of user_email or employee_id is required")
 
         try:
-            if from_api and not check_meta:
-                if employee_id:
-                    user_email = get_user_meta(employee_id=employee_id).user
-                if user_email:
-                    slack_user = self.slack_app.client.users_lookupByEmail(email=user_email)
-                    return {
-                        "id": slack_user.get("user", {}).get("id"),
-                        "name": slack_user.get("user", {}).get("name"),
-                    }
-                return None
-
-            user_meta = None
-            if check_meta:
-                user_meta = get_user_meta(user_id=user_email) if user_email else get_user_meta(employee_id=employee_id)
-                if user_meta and user_meta.custom_slack_userid:
-                    return {
-                        "id": user_meta.custom_slack_userid,
-                        "name": user_meta.custom_slack_username,
-                    }
+            slack_details = None
+            if check_meta or (from_api and employee_id):
+                slack_details = (
+                    get_slack_details(user_ids=[user_email]).get(user_email)
+                    if user_email
+                    else get_slack_details(employee_ids=[employee_id]).get(employee_id)
+                )
+            if check_meta and slack_details and slack_details.slack_id:
+                return {
+                    "id": slack_details.slack_id,
+                    "name": slack_details.slack_name,
+                }
 
             if not from_api:
                 return None
 
-            slack_email = user_meta.user if user_meta else user_email
+            slack_email = slack_details.user if slack_details else user_email
             if not slack_email:
                 return None
 
@@ -163,7 +183,6 @@ class SlackIntegration:
     ) -> None:
         import hashlib
         import hmac
-        import time
 
         # Verify the timestamp to prevent replay attacks
         if abs(time.time() - int(timestamp)) > 60 * 5:
@@ -192,3 +211,45 @@ class SlackIntegration:
         """
         slack_user = self.get_slack_user(*args, **kwargs)
         return slack_user.get("id") if slack_user else None
+
+
+def get_slack_integration() -> SlackIntegration:
+    """
+    Get the Slack Integration instance for the current site
+    The instance (and its Slack client) is built once per worker and reused
+    across requests and jobs until the Slack Settings are saved again
+    """
+    site = frappe.local.site
+    version = frappe.cache.get_value(SLACK_INTEGRATION_VERSION_KEY, generator=frappe.generate_hash)
+
+    cached = _slack_integrations.get(site)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    with _slack_integrations_lock:
+        cached = _slack_integrations.get(site)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        slack = SlackIntegration()
+        _slack_integrations[site] = (version, slack)
+        return slack
+
+
+def clear_slack_integration_cache() -> None:
+    """
+    Invalidate the cached Slack Integration instance for the current site
+    Other workers rebuild their instance on the next access
+    """
+    _slack_integrations.pop(frappe.local.site, None)
+    frappe.cache.delete_value(SLACK_INTEGRATION_VERSION_KEY)
+
+
+def get_retry_after(headers: dict) -> int:
+    """
+    Get the seconds to wait from the `Retry-After` header of a rate limited response
+    """
+    for header, value in (headers or {}).items():
+        if header.lower() == "retry-after":
+            return int(value)
+    return 1
@@ -1,18 +1,25 @@
 import frappe
 from frappe import _
+from slack_sdk.webhook import WebhookClient
 
 from frappe_slack_connector.db.leave_application import approve_leave, reject_leave
 from frappe_slack_connector.db.user_meta import get_userid_from_slackid
 from frappe_slack_connector.helpers.error import generate_error_log
 from frappe_slack_connector.helpers.str_utils import strip_html_tags
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import SlackIntegration, get_slack_integration
 
+LEAVE_BULK_ACTIONS_BLOCK = "leave_bulk_actions_block"
+LEAVE_BULK_SELECT = "ignore_leave_bulk_select"
+LEAVE_ERROR_BLOCK = "leave_error_block"
 
-def handler(slack: SlackIntegration, payload: dict):
+
+def handler(slack: SlackIntegration, payload: dict, deferred: bool = False):
     """
     Handle the interaction when a leave application is approved or rejected
     Update the message in Slack with the status of the leave application
     Update the leave application in ERP accordingly
+    When deferred to a background job, the trigger_id has expired by then,
+    so the errors are reported with an ephemeral message instead of a modal
     """
     try:
         # Check the user who sent the request
@@ -32,54 +39,168 @@ def handler(slack: SlackIntegration, payload: dict):
         else:
             frappe.throw(_("Unknown action"))
 
-        blocks = payload["message"]["blocks"]
-
         status_text = "Approved :white_check_mark:" if action_id == "leave_approve" else "Rejected :x:"
 
-        # Replace the actions block with a status update
-        for i, block in enumerate(blocks):
-            if block.get("block_id") == "leave_actions_block":
-                blocks[i] = {
-                    "type": "section",
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": f"*Status:* {status_text}",
-                    },
-                }
-            elif block.get("block_id") == "footer_block":
-                # delete the footer block
-                blocks.pop(i)
-
         # Update the message with the new blocks
         slack.slack_app.client.chat_update(
             channel=payload["channel"]["id"],
             ts=payload["container"]["message_ts"],
-            blocks=blocks,
+            blocks=update_leave_blocks(payload["message"]["blocks"], {leave_id: status_text}),
+        )
+    except Exception as e:
+        if deferred:
+            send_error_message(payload["response_url"], "Error taking action on leave request", str(e))
+        else:
+            show_error_modal(slack, payload["trigger_id"], str(e))
+
+
+def bulk_handler(slack: SlackIntegration, payload: dict):
+    """
+    Handle the bulk approval or rejection of the leave applications selected in a digest message
+    The leave applications are processed in a background job, and the message is updated once done
+    """
+    selected_options = (
+        payload.get("state", {})
+        .get("values", {})
+        .get(LEAVE_BULK_ACTIONS_BLOCK, {})
+        .get(LEAVE_BULK_SELECT, {})
+        .get("selected_options")
+    )
+    if not selected_options:
+        return show_error_modal(slack, payload["trigger_id"], "Please select the leave applications first")
+
+    frappe.enqueue(
+        bulk_background_handler,
+        queue="long",
+        payload=payload,
+        leave_ids=[option["value"] for option in selected_options],
+    )
+
+
+def bulk_background_handler(payload: dict, leave_ids: list):
+    """
+    Background job to approve or reject the selected leave applications
+    Each leave application is committed on its own, so a failure does not roll back the others
+    The result of each leave application is reported in the digest message, the failed ones
+    keep their actions so that they can be retried
+    """
+    slack = get_slack_integration()
+    try:
+        frappe.set_user(get_userid_from_slackid(payload["user"]["id"]))  # nosemgrep
+
+        action_id = payload["actions"][0]["action_id"]
+        if action_id == "leave_bulk_approve":
+            process_leave, status_text = approve_leave, "Approved :white_check_mark:"
+        elif action_id == "leave_bulk_reject":
+            process_leave, status_text = reject_leave, "Rejected :x:"
+        else:
+            frappe.throw(_("Unknown action"))
+
+        statuses = {}
+        errors = {}
+        for leave_id in leave_ids:
+            try:
+                process_leave(leave_id)
+                frappe.db.commit()  # nosemgrep
+                statuses[leave_id] = status_text
+            except Exception as e:
+                frappe.db.rollback()
+                errors[leave_id] = strip_html_tags(str(e)) or "Please check ERP dashboard"
+
+        slack.slack_app.client.chat_update(
+            channel=payload["channel"]["id"],
+            ts=payload["container"]["message_ts"],
+            blocks=update_leave_blocks(payload["message"]["blocks"], statuses, errors),
         )
     except Exception as e:
-        # show an error modal with the exception message
-        slack.slack_app.client.views_open(
-            trigger_id=payload["trigger_id"],
-            view={
-                "type": "modal",
-                "title": {"type": "plain_text", "text": "Error"},
-                "blocks": [
-                    {
-                        "type": "header",
-                        "text": {
-                            "type": "plain_text",
-                            "text": ":warning: Error taking action on leave request",
-                            "emoji": True,
-                        },
+        generate_error_log("Error processing the leave applications in bulk", exception=e)
+        if payload.get("response_url"):
+            send_error_message(payload["response_url"], "Error taking action on leave requests", str(e))
+
+
+def update_leave_blocks(blocks: list, statuses: dict, errors: dict | None = None) -> list:
+    """
+    Replace the actions blocks of the processed leave applications with their status
+    The processed leave applications are also removed from the bulk selection of a digest,
+    and the bulk actions and the footer are removed once nothing is pending
+    The leave applications that failed keep their actions, with the error shown below them
+    """
+    errors = errors or {}
+    # Errors of the earlier attempts are replaced by the result of this one
+    stale_error_blocks = {f"{LEAVE_ERROR_BLOCK}_{leave_id}" for leave_id in statuses.keys() | errors.keys()}
+
+    updated_blocks = []
+    for block in blocks:
+        block_id = block.get("block_id", "")
+        if block_id in stale_error_blocks:
+            continue
+        elif block_id.startswith("leave_actions_block") and block["elements"][0].get("value") in statuses:
+            block = {
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"*Status:* {statuses[block['elements'][0]['value']]}",
+                },
+            }
+        elif block_id.startswith("leave_actions_block") and block["elements"][0].get("value") in errors:
+            leave_id = block["elements"][0]["value"]
+            updated_blocks.append(block)
+            block = {
+                "type": "context",
+                "block_id": f"{LEAVE_ERROR_BLOCK}_{leave_id}",
+                "elements": [{"type": "mrkdwn", "text": f":warning: Failed: {errors[leave_id]}"}],
+            }
+        elif block_id == LEAVE_BULK_ACTIONS_BLOCK:
+            select = block["elements"][0]
+            select["options"] = [option for option in select["options"] if option["value"] not in statuses]
+            if not select["options"]:
+                continue
+        updated_blocks.append(block)
+
+    if not any(block.get("block_id", "").startswith("leave_actions_block") for block in updated_blocks):
+        updated_blocks = [
+            block for block in updated_blocks if block.get("block_id") not in ("footer_block", LEAVE_BULK_ACTIONS_BLOCK)
+        ]
+    return updated_blocks
+
+
+def show_error_modal(slack: SlackIntegration, trigger_id: str, exc: str):
+    """
+    Show an error modal with the exception message
+    """
+    slack.slack_app.client.views_open(
+        trigger_id=trigger_id,
+        view={
+            "type": "modal",
+            "title": {"type": "plain_text", "text": "Error"},
+            "blocks": [
+                {
+                    "type": "header",
+                    "text": {
+                        "type": "plain_text",
+                        "text": ":warning: Error taking action on leave request",
+                        "emoji": True,
                     },
-                    {"type": "divider"},
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"*Error Details:*\n```{strip_html_tags(str(e))}```",
-                        },
+                },
+                {"type": "divider"},
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": f"*Error Details:*\n```{strip_html_tags(exc)}```",
                     },
-                ],
-            },
-        )
+                },
+            ],
+        },
+    )
+
+
+def send_error_message(response_url: str, title: str, exc: str):
+    """
+    Reply to the interaction with an ephemeral error message, visible only to the user
+    """
+    WebhookClient(response_url).send(
+        text=f":warning: {title}\n```{strip_html_tags(exc)}```",
+        response_type="ephemeral",
+        replace_original=False,
+    )
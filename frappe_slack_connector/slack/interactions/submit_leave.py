@@ -6,7 +6,7 @@ from frappe_slack_connector.db.leave_application import custom_fields_exist
 from frappe_slack_connector.db.user_meta import get_employeeid_from_slackid
 from frappe_slack_connector.helpers.http_response import send_http_response
 from frappe_slack_connector.helpers.str_utils import strip_html_tags
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import SlackIntegration, get_slack_integration
 
 
 def handler(slack: SlackIntegration, payload: dict):
@@ -17,92 +17,156 @@ def handler(slack: SlackIntegration, payload: dict):
     if not payload:
         frappe.throw(_("No payload found"), frappe.ValidationError)
     try:
-        # Extract relevant information
-        user_info = payload["user"]
-        view_state = payload["view"]["state"]["values"]
-
-        # Extract leave details
-        start_date = view_state["start_date"]["start_date_picker"]["selected_date"]
-        end_date = view_state["end_date"]["end_date_picker"]["selected_date"]
-        leave_type = view_state["leave_type"]["leave_type_select"]["selected_option"]["value"]
-        reason = view_state["reason"]["reason_input"]["value"]
-
-        # Check if it's a half day
-        is_half_day = len(view_state["half_day_checkbox"]["half_day_checkbox"]["selected_options"]) > 0
-        half_day_period = None
-        half_day_date = None
-        if is_half_day:
-            if custom_fields_exist():
-                half_day_period = view_state["half_day_period"]["half_day_period_select"]["selected_option"]["value"]
-            half_day_date = (
-                view_state["half_day_date"]["half_day_date_picker"]["selected_date"]
-                if view_state.get("half_day_date")
-                else start_date
-            )
-
-        # Get the employee based on the Slack user ID
-        employee = get_employeeid_from_slackid(user_info["id"])
-        if not employee:
-            frappe.throw(_("No employee found for this Slack user"), frappe.ValidationError)
-
-        # Create the leave application
-        leave_application = frappe.get_doc(
-            {
-                "doctype": "Leave Application",
-                "employee": employee,
-                "leave_type": leave_type,
-                "from_date": start_date,
-                "leave_approver": get_leave_approver(employee),
-                "to_date": end_date,
-                "status": "Open",
-                "description": reason,
-            }
-        )
-
-        if is_half_day:
-            leave_application.half_day = 1
-            leave_application.half_day_date = half_day_date
-            if custom_fields_exist():
-                leave_application.custom_first_halfsecond_half = (
-                    "First Half" if half_day_period == "first_half" else "Second Half"
-                )
-
-        leave_application.save(ignore_permissions=True)
+        create_leave_application(payload["user"]["id"], get_leave_details(payload))
         frappe.db.commit()
         # This will remove the extra messages which frappe adds
         # while saving the leave, as slack need empty object in response.
         clear_messages()
 
     except Exception as e:
-        response = {
-            "response_action": "push",
-            "view": {
-                "type": "modal",
-                "title": {"type": "plain_text", "text": "Error"},
-                "blocks": [
-                    {
-                        "type": "header",
-                        "text": {
-                            "type": "plain_text",
-                            "text": ":warning: Error submitting leave request",
-                            "emoji": True,
-                        },
-                    },
-                    {"type": "divider"},
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"*Error Details:*\n```{strip_html_tags(str(e))}```",
-                        },
-                    },
-                ],
-            },
-        }
         return send_http_response(
-            body=response,
+            body=format_error_response(str(e)),
+        )
+
+
+def enqueue_handler(slack: SlackIntegration, payload: dict):
+    """
+    Validate the leave application modal and create the leave in a background job
+    The modal closes right away, errors are sent to the user as a direct message
+    """
+    if not payload:
+        frappe.throw(_("No payload found"), frappe.ValidationError)
+    try:
+        get_leave_details(payload)
+    except Exception as e:
+        return send_http_response(
+            body=format_error_response(str(e)),
+        )
+
+    frappe.enqueue(background_handler, queue="short", payload=payload)
+    return send_http_response(
+        status_code=200,
+        is_empty=True,
+    )
+
+
+def background_handler(payload: dict):
+    """
+    Background job to create the leave application from the modal submission
+    The applicant confirmation is sent by the Leave Application after_insert hook
+    """
+    slack_user_id = payload["user"]["id"]
+    try:
+        create_leave_application(slack_user_id, get_leave_details(payload))
+        frappe.db.commit()  # nosemgrep
+    except Exception as e:
+        frappe.db.rollback()
+        get_slack_integration().slack_app.client.chat_postMessage(
+            channel=slack_user_id,
+            text=f":warning: Error submitting leave request\n```{strip_html_tags(str(e))}```",
+        )
+
+
+def get_leave_details(payload: dict) -> frappe._dict:
+    """
+    Extract the leave details from the leave application modal submission
+    """
+    view_state = payload["view"]["state"]["values"]
+
+    # Extract leave details
+    start_date = view_state["start_date"]["start_date_picker"]["selected_date"]
+    end_date = view_state["end_date"]["end_date_picker"]["selected_date"]
+    leave_type = view_state["leave_type"]["leave_type_select"]["selected_option"]["value"]
+    reason = view_state["reason"]["reason_input"]["value"]
+
+    # Check if it's a half day
+    is_half_day = len(view_state["half_day_checkbox"]["half_day_checkbox"]["selected_options"]) > 0
+    half_day_period = None
+    half_day_date = None
+    if is_half_day:
+        if custom_fields_exist():
+            half_day_period = view_state["half_day_period"]["half_day_period_select"]["selected_option"]["value"]
+        half_day_date = (
+            view_state["half_day_date"]["half_day_date_picker"]["selected_date"]
+            if view_state.get("half_day_date")
+            else start_date
         )
 
+    return frappe._dict(
+        start_date=start_date,
+        end_date=end_date,
+        leave_type=leave_type,
+        reason=reason,
+        is_half_day=is_half_day,
+        half_day_period=half_day_period,
+        half_day_date=half_day_date,
+    )
+
+
+def create_leave_application(slack_user_id: str, details: dict):
+    """
+    Create the leave application for the employee of the given Slack user
+    """
+    # Get the employee based on the Slack user ID
+    employee = get_employeeid_from_slackid(slack_user_id)
+    if not employee:
+        frappe.throw(_("No employee found for this Slack user"), frappe.ValidationError)
+
+    # Create the leave application
+    leave_application = frappe.get_doc(
+        {
+            "doctype": "Leave Application",
+            "employee": employee,
+            "leave_type": details.leave_type,
+            "from_date": details.start_date,
+            "leave_approver": get_leave_approver(employee),
+            "to_date": details.end_date,
+            "status": "Open",
+            "description": details.reason,
+        }
+    )
+
+    if details.is_half_day:
+        leave_application.half_day = 1
+        leave_application.half_day_date = details.half_day_date
+        if custom_fields_exist():
+            leave_application.custom_first_halfsecond_half = (
+                "First Half" if details.half_day_period == "first_half" else "Second Half"
+            )
+
+    leave_application.save(ignore_permissions=True)
+
+
+def format_error_response(exc: str) -> dict:
+    """
+    Format the error modal pushed on top of the leave application modal
+    """
+    return {
+        "response_action": "push",
+        "view": {
+            "type": "modal",
+            "title": {"type": "plain_text", "text": "Error"},
+            "blocks": [
+                {
+                    "type": "header",
+                    "text": {
+                        "type": "plain_text",
+                        "text": ":warning: Error submitting leave request",
+                        "emoji": True,
+                    },
+                },
+                {"type": "divider"},
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": f"*Error Details:*\n```{strip_html_tags(exc)}```",
+                    },
+                },
+            ],
+        },
+    }
+
 
 def half_day_checkbox_handler(slack: SlackIntegration, payload: dict):
     """
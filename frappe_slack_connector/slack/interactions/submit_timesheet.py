@@ -2,14 +2,11 @@ import frappe
 from frappe.utils import getdate
 
 from frappe_slack_connector.db.timesheet import create_timesheet_detail
-from frappe_slack_connector.db.user_meta import (
-    get_employeeid_from_slackid,
-    get_userid_from_slackid,
-)
+from frappe_slack_connector.db.user_meta import get_slack_identity
 from frappe_slack_connector.helpers.error import generate_error_log
 from frappe_slack_connector.helpers.http_response import send_http_response
 from frappe_slack_connector.helpers.str_utils import strip_html_tags
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import SlackIntegration, get_slack_integration
 
 
 def handler(slack: SlackIntegration, payload: dict):
@@ -21,34 +18,7 @@ def handler(slack: SlackIntegration, payload: dict):
         frappe.throw(frappe._("No payload found"), frappe.ValidationError)
 
     try:
-        user_info = payload["user"]
-        view_state = payload["view"]["state"]["values"]
-        employee = get_employeeid_from_slackid(user_info["id"])
-
-        # Set the user performing the action
-        # Request is verified by signature in the parent function, so we can trust the user ID from the payload
-        frappe.set_user(get_userid_from_slackid(user_info["id"]))  # nosemgrep
-
-        task = view_state["task_block"]["task_select"]["selected_option"]["value"]
-        date = view_state["entry_date"]["date_picker"]["selected_date"]
-        description = view_state["description"]["description_input"]["value"]
-        hours = float(view_state["hours_block"]["hours_input"]["value"])
-        if not task:
-            raise Exception("Task is mandatory.")
-
-        project = frappe.get_value("Task", task, "project")
-        parent = frappe.db.get_value(
-            "Timesheet",
-            {
-                "employee": employee,
-                "start_date": [">=", getdate(date)],
-                "end_date": ["<=", getdate(date)],
-                "parent_project": project,
-                "docstatus": ["!=", 2],
-            },
-            "name",
-        )
-        create_timesheet_detail(date, hours, description, task, employee, parent)
+        save_timesheet_entry(payload["user"]["id"], get_timesheet_entry(payload))
         response = {
             "response_action": "push",
             "view": {
@@ -74,36 +44,162 @@ def handler(slack: SlackIntegration, payload: dict):
         )
 
     except Exception as e:
-        exc = str(e)
-        if not exc:
-            exc = "There was an error submitting the timesheet. Please check ERP dashboard"
-            generate_error_log("Error submitting timesheet via Slack", message=frappe.get_traceback())
+        return send_http_response(
+            body=format_error_response(get_error_text(e)),
+        )
 
-        response = {
-            "response_action": "push",
-            "view": {
-                "type": "modal",
-                "title": {"type": "plain_text", "text": "Error"},
-                "blocks": [
-                    {
-                        "type": "header",
-                        "text": {
-                            "type": "plain_text",
-                            "text": ":warning: Error submitting timesheet",
-                            "emoji": True,
-                        },
+
+def enqueue_handler(slack: SlackIntegration, payload: dict):
+    """
+    Validate the timesheet submission and save it in a background job
+    The user is notified about the result via a direct message
+    """
+    if not payload:
+        frappe.throw(frappe._("No payload found"), frappe.ValidationError)
+
+    try:
+        get_timesheet_entry(payload)
+    except Exception as e:
+        return send_http_response(
+            body=format_error_response(get_error_text(e)),
+        )
+
+    frappe.enqueue(background_handler, queue="short", payload=payload)
+    response = {
+        "response_action": "push",
+        "view": {
+            "type": "modal",
+            "title": {"type": "plain_text", "text": "Submitted"},
+            "close": {"type": "plain_text", "text": "Close"},
+            "clear_on_close": True,
+            "blocks": [
+                {
+                    "type": "header",
+                    "text": {
+                        "type": "plain_text",
+                        "text": ":hourglass_flowing_sand: Timesheet is being submitted",
+                        "emoji": True,
                     },
-                    {"type": "divider"},
-                    {
-                        "type": "section",
-                        "text": {
+                },
+                {
+                    "type": "context",
+                    "elements": [
+                        {
                             "type": "mrkdwn",
-                            "text": f"*Error Details:*\n```{strip_html_tags(exc)}```",
-                        },
+                            "text": "You will receive a message once it is saved.",
+                        }
+                    ],
+                },
+            ],
+        },
+    }
+    return send_http_response(
+        body=response,
+        status_code=200,
+    )
+
+
+def background_handler(payload: dict):
+    """
+    Background job to save the timesheet submission
+    Sends the result to the user as a direct message
+    """
+    slack = get_slack_integration()
+    slack_user_id = payload["user"]["id"]
+
+    try:
+        entry = get_timesheet_entry(payload)
+        save_timesheet_entry(slack_user_id, entry)
+        frappe.db.commit()  # nosemgrep
+        text = f":white_check_mark: Timesheet submitted successfully for *{entry.date}* ({entry.hours:g}h)"
+    except Exception as e:
+        frappe.db.rollback()
+        text = f":warning: Error submitting timesheet\n```{strip_html_tags(get_error_text(e))}```"
+
+    slack.slack_app.client.chat_postMessage(channel=slack_user_id, text=text)
+
+
+def get_timesheet_entry(payload: dict) -> frappe._dict:
+    """
+    Extract and validate the timesheet entry from the modal submission
+    """
+    view_state = payload["view"]["state"]["values"]
+
+    task = view_state["task_block"]["task_select"]["selected_option"]["value"]
+    date = view_state["entry_date"]["date_picker"]["selected_date"]
+    description = view_state["description"]["description_input"]["value"]
+    hours = float(view_state["hours_block"]["hours_input"]["value"])
+    if not task:
+        raise Exception("Task is mandatory.")
+
+    return frappe._dict(task=task, date=date, description=description, hours=hours)
+
+
+def save_timesheet_entry(slack_user_id: str, entry: dict):
+    """
+    Save the timesheet entry in the timesheet of the Slack user's employee
+    """
+    identity = get_slack_identity(slack_user_id)
+    if not identity or not identity.user:
+        raise Exception("User not found on ERP")
+    employee = identity.employee
+
+    # Set the user performing the action
+    # Request is verified by signature in the parent function, so we can trust the user ID from the payload
+    frappe.set_user(identity.user)  # nosemgrep
+
+    project = frappe.get_value("Task", entry.task, "project")
+    parent = frappe.db.get_value(
+        "Timesheet",
+        {
+            "employee": employee,
+            "start_date": [">=", getdate(entry.date)],
+            "end_date": ["<=", getdate(entry.date)],
+            "parent_project": project,
+            "docstatus": ["!=", 2],
+        },
+        "name",
+    )
+    create_timesheet_detail(entry.date, entry.hours, entry.description, entry.task, employee, parent)
+
+
+def get_error_text(exception: Exception) -> str:
+    """
+    Get the error text to show for the exception, logging unexpected errors
+    """
+    exc = str(exception)
+    if not exc:
+        exc = "There was an error submitting the timesheet. Please check ERP dashboard"
+        generate_error_log("Error submitting timesheet via Slack", message=frappe.get_traceback())
+    return exc
+
+
+def format_error_response(exc: str) -> dict:
+    """
+    Format the error modal pushed on top of the timesheet modal
+    """
+    return {
+        "response_action": "push",
+        "view": {
+            "type": "modal",
+            "title": {"type": "plain_text", "text": "Error"},
+            "blocks": [
+                {
+                    "type": "header",
+                    "text": {
+                        "type": "plain_text",
+                        "text": ":warning: Error submitting timesheet",
+                        "emoji": True,
                     },
-                ],
-            },
-        }
-        return send_http_response(
-            body=response,
-        )
+                },
+                {"type": "divider"},
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": f"*Error Details:*\n```{strip_html_tags(exc)}```",
+                    },
+                },
+            ],
+        },
+    }
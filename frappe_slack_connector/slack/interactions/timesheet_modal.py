@@ -1,9 +1,7 @@
 import frappe
 
-from frappe_slack_connector.db.timesheet import get_user_projects, get_user_tasks
 from frappe_slack_connector.db.user_meta import get_userid_from_slackid
 from frappe_slack_connector.helpers.error import generate_error_log
-from frappe_slack_connector.helpers.str_utils import truncate_text
 from frappe_slack_connector.slack.app import SlackIntegration
 
 
@@ -16,24 +14,13 @@ def show_timesheet_modal(slack: SlackIntegration, slack_userid: str, slack_trigg
         if user_email is None:
             raise Exception("User not found on ERP")
 
-        # NOTE: `set_user()` will effectively wipe out frappe.form_dict
-        # Request is verified by signature in the parent function, so we can trust the user ID from the payload
-        frappe.set_user(user_email)  # nosemgrep
-        projects = get_user_projects(user_email)
-        tasks = get_user_tasks(user_email)
-
-        if not projects:
-            raise Exception("No projects found")
-        if not tasks:
-            raise Exception("No tasks found")
-
         slack.slack_app.client.views_open(
             trigger_id=slack_trigger_id,
             view={
                 "type": "modal",
                 "callback_id": "timesheet_modal",
                 "title": {"type": "plain_text", "text": "Timesheet Entry"},
-                "blocks": build_timesheet_form(projects, tasks),
+                "blocks": build_timesheet_form(),
                 "close": {"type": "plain_text", "text": "Cancel", "emoji": True},
                 "submit": {
                     "type": "plain_text",
@@ -74,10 +61,10 @@ def show_timesheet_modal(slack: SlackIntegration, slack_userid: str, slack_trigg
         )
 
 
-def build_timesheet_form(projects: list, tasks: list) -> list:
+def build_timesheet_form() -> list:
     """
     Build the form for the timesheet modal
-    Provide options for project and task
+    The project and task options are loaded from the options load URL as the user types
     """
 
     blocks = [
@@ -97,22 +84,11 @@ def build_timesheet_form(projects: list, tasks: list) -> list:
         },
         {
             "type": "input",
-            "dispatch_action": True,
             "block_id": "project_block",
             "element": {
-                "type": "static_select",
+                "type": "external_select",
                 "action_id": "project_select",
-                "options": [
-                    {
-                        "text": {
-                            "type": "plain_text",
-                            # Limit the text to 75 characters
-                            "text": truncate_text(project.get("project_name")),
-                        },
-                        "value": project.get("name"),
-                    }
-                    for project in projects
-                ],
+                "min_query_length": 0,
                 "placeholder": {"type": "plain_text", "text": "Enter project name"},
             },
             "label": {"type": "plain_text", "text": "Project", "emoji": True},
@@ -122,23 +98,9 @@ def build_timesheet_form(projects: list, tasks: list) -> list:
             "block_id": "task_block",
             "dispatch_action": True,
             "element": {
-                "type": "static_select",
+                "type": "external_select",
                 "action_id": "task_select",
-                "options": [
-                    {
-                        "text": {
-                            "type": "plain_text",
-                            # Limit the text to 75 characters
-                            "text": truncate_text(task.get("subject", task.get("name", ""))),
-                        },
-                        "value": task.get("name"),
-                        "description": {
-                            "type": "plain_text",
-                            "text": truncate_text(task.get("name")),
-                        },
-                    }
-                    for task in tasks
-                ],
+                "min_query_length": 0,
                 "placeholder": {
                     "type": "plain_text",
                     "text": "Enter task description",
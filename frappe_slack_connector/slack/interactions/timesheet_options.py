@@ -0,0 +1,67 @@
+import frappe
+
+from frappe_slack_connector.db.timesheet import search_user_projects, search_user_tasks
+from frappe_slack_connector.db.user_meta import get_userid_from_slackid
+from frappe_slack_connector.helpers.error import generate_error_log
+from frappe_slack_connector.helpers.http_response import send_http_response
+from frappe_slack_connector.helpers.str_utils import truncate_text
+from frappe_slack_connector.slack.app import SlackIntegration
+
+
+def handler(slack: SlackIntegration, payload: dict):
+    """
+    Handle the options load request of the timesheet project and task selects
+    Slack calls this as the user types in an `external_select`, and expects
+    the matching options in the response
+    """
+    options = []
+    try:
+        user = get_userid_from_slackid(payload["user"]["id"])
+        # Request is verified by signature in the parent function, so we can trust the user ID from the payload
+        frappe.set_user(user)  # nosemgrep
+
+        query = (payload.get("value") or "").strip()
+        if payload["action_id"] == "project_select":
+            options = [
+                {
+                    "text": {
+                        "type": "plain_text",
+                        # Limit the text to 75 characters
+                        "text": truncate_text(project.get("project_name") or project.get("name")),
+                    },
+                    "value": project.get("name"),
+                }
+                for project in search_user_projects(user, query)
+            ]
+        elif payload["action_id"] == "task_select":
+            options = [
+                {
+                    "text": {
+                        "type": "plain_text",
+                        # Limit the text to 75 characters
+                        "text": truncate_text(task.get("subject") or task.get("name")),
+                    },
+                    "value": task.get("name"),
+                    "description": {
+                        "type": "plain_text",
+                        "text": truncate_text(task.get("name")),
+                    },
+                }
+                for task in search_user_tasks(user, query, get_selected_project(payload))
+            ]
+    except Exception as e:
+        generate_error_log("Error loading timesheet options", exception=e)
+
+    return send_http_response(
+        body={"options": options},
+        status_code=200,
+    )
+
+
+def get_selected_project(payload: dict) -> str | None:
+    """
+    Get the project selected in the timesheet modal, if any
+    """
+    state = payload.get("view", {}).get("state", {}).get("values", {})
+    selected_option = state.get("project_block", {}).get("project_select", {}).get("selected_option")
+    return selected_option.get("value") if selected_option else None
@@ -0,0 +1,259 @@
+import json
+from datetime import timedelta
+
+import frappe
+from frappe.utils import now_datetime
+
+from frappe_slack_connector.helpers.error import generate_error_log
+from frappe_slack_connector.slack.app import get_slack_integration
+from frappe_slack_connector.slack.sender import SlackMessageSender
+
+####################################################################
+#                                                                  #
+# Slack Message Outbox                                             #
+# -----------------------------------------------------------------#
+# Outgoing messages are saved in the Slack Message Outbox and sent #
+# by a background job, retrying the failed ones with backoff, so   #
+# that a Slack outage does not drop them                           #
+#                                                                  #
+####################################################################
+
+OUTBOX_DOCTYPE = "Slack Message Outbox"
+OUTBOX_DRAIN_JOB_ID = "slack_message_outbox_drain"
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 8
+
+# Messages being sent are held back for this long, so that another
+# job does not pick them up, and are retried if the job dies meanwhile
+OUTBOX_LEASE = timedelta(minutes=5)
+
+# Retry after 1, 2, 4, ... minutes, up to 6 hours
+OUTBOX_RETRY_BASE = timedelta(minutes=1)
+OUTBOX_RETRY_MAX = timedelta(hours=6)
+
+
+def queue_messages(
+    messages: list,
+    *,
+    method: str = "chat_postMessage",
+    reference_doctype: str | None = None,
+    reference_name: str | None = None,
+    reference_ts_field: str | None = None,
+    deliver_now: bool = False,
+) -> list:
+    """
+    Save the messages in the outbox to be sent by the background job
+    Each message is a dict with the keyword arguments for the Slack API method,
+    along with an optional `idempotency_key`; a message whose key is already in
+    the outbox is not queued again
+    With `reference_ts_field`, the message timestamp is saved in that field of
+    the reference document once the message is sent, even if only on a retry
+    With `deliver_now`, the messages are sent right away instead, and their
+    outbox rows (with the `status` and `message_ts`) are returned, the existing
+    rows in place of the messages which were already in the outbox
+    NOTE: `deliver_now` commits the current transaction before sending, so that the
+    idempotency keys of the messages are saved before Slack receives them
+    """
+    if not messages:
+        return []
+
+    now = now_datetime()
+    rows = []
+    for message in messages:
+        message = dict(message)
+        rows.append(
+            frappe._dict(
+                name=frappe.generate_hash(length=10),
+                idempotency_key=message.pop("idempotency_key", None),
+                channel=message.get("channel"),
+                method=method,
+                payload=frappe.as_json(message),
+                status="Queued",
+                attempts=0,
+                # Hold back the messages sent right away from the background job
+                next_attempt_at=now + OUTBOX_LEASE if deliver_now else now,
+                reference_doctype=reference_doctype,
+                reference_name=reference_name,
+                reference_ts_field=reference_ts_field,
+            )
+        )
+
+    fields = list(rows[0])
+    frappe.db.bulk_insert(
+        OUTBOX_DOCTYPE,
+        fields=[*fields, "owner", "modified_by", "creation", "modified"],
+        values=[
+            (*(row[field] for field in fields), frappe.session.user, frappe.session.user, now, now) for row in rows
+        ],
+        ignore_duplicates=True,
+    )
+
+    if deliver_now:
+        # Only send the rows which were inserted, and not deduplicated
+        queued = set(frappe.get_all(OUTBOX_DOCTYPE, filters={"name": ["in", [row.name for row in rows]]}, pluck="name"))
+        frappe.db.commit()  # nosemgrep
+        deliver_messages([row for row in rows if row.name in queued])
+        return [row if row.name in queued else get_existing_message(row) for row in rows]
+
+    enqueue_drain()
+    return rows
+
+
+def enqueue_drain() -> None:
+    """
+    Enqueue the job to send the queued messages, once the current transaction is committed
+    """
+    frappe.enqueue(
+        drain_outbox,
+        queue="short",
+        job_id=OUTBOX_DRAIN_JOB_ID,
+        deduplicate=True,
+        enqueue_after_commit=True,
+    )
+
+
+def get_existing_message(row: frappe._dict) -> frappe._dict:
+    """
+    Get the outbox row already queued with the idempotency key of the given row
+    """
+    existing = frappe.get_all(
+        OUTBOX_DOCTYPE,
+        filters={"idempotency_key": row.idempotency_key},
+        fields=["name", "idempotency_key", "channel", "method", "status", "attempts", "message_ts", "last_error"],
+        limit=1,
+    )
+    return existing[0] if existing else row
+
+
+def retry_due_messages() -> None:
+    """
+    Scheduler job to retry the failed messages once their backoff has passed
+    Only checks whether any message is due, the drain job claims and sends them
+    """
+    if frappe.db.exists(OUTBOX_DOCTYPE, {"status": "Queued", "next_attempt_at": ["<=", now_datetime()]}):
+        enqueue_drain()
+
+
+def drain_outbox() -> None:
+    """
+    Background job to send the messages which are due in the outbox, in batches
+    Claims until nothing is due, as the messages queued while the job runs
+    don't enqueue another one (the job is deduplicated)
+    """
+    while rows := claim_due_messages():
+        deliver_messages(rows)
+
+
+def claim_due_messages() -> list:
+    """
+    Get a batch of the messages which are due, and hold them back for the lease duration
+    The rows are locked while claimed, so concurrent jobs do not send the same message
+    """
+    now = now_datetime()
+    rows = frappe.get_all(
+        OUTBOX_DOCTYPE,
+        filters={"status": "Queued", "next_attempt_at": ["<=", now]},
+        fields=["name", "method", "payload", "attempts", "reference_doctype", "reference_name", "reference_ts_field"],
+        order_by="creation asc",
+        limit=OUTBOX_BATCH_SIZE,
+        for_update=True,
+    )
+    if rows:
+        frappe.db.bulk_update(
+            OUTBOX_DOCTYPE,
+            {row.name: {"next_attempt_at": now + OUTBOX_LEASE} for row in rows},
+            update_modified=False,
+        )
+    frappe.db.commit()  # nosemgrep
+    return rows
+
+
+def deliver_messages(rows: list) -> None:
+    """
+    Send the outbox messages, and record the delivery status of each of them
+    Each sent message is committed right away, so that it is not sent again if the job dies midway
+    The failed messages are retried with backoff, until the attempts run out
+    """
+    sender = SlackMessageSender(get_slack_integration())
+
+    methods = {}
+    for row in rows:
+        methods.setdefault(row.method, []).append(row)
+
+    failures = {}
+    for method, method_rows in methods.items():
+        payloads = [row.payload if isinstance(row.payload, dict) else json.loads(row.payload) for row in method_rows]
+        for index, result in sender.iter_send(payloads, method):
+            row = method_rows[index]
+            attempts = row.attempts + 1
+            now = now_datetime()
+            if result.ok:
+                row.update(
+                    {
+                        "status": "Sent",
+                        "attempts": attempts,
+                        "next_attempt_at": None,
+                        "sent_at": now,
+                        "message_ts": result.response.get("ts"),
+                        "last_error": None,
+                    }
+                )
+                record_sent_message(row)
+                continue
+
+            # Every failure sets the same fields, as required by the bulk update
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                update = {
+                    "status": "Failed",
+                    "attempts": attempts,
+                    "next_attempt_at": None,
+                    "last_error": str(result.error),
+                }
+                generate_error_log(
+                    title="Error sending Slack message",
+                    message=f"Slack Message Outbox: {row.name}",
+                    exception=result.error,
+                )
+            else:
+                update = {
+                    "status": "Queued",
+                    "attempts": attempts,
+                    "next_attempt_at": now + min(OUTBOX_RETRY_BASE * 2 ** (attempts - 1), OUTBOX_RETRY_MAX),
+                    "last_error": str(result.error),
+                }
+
+            failures[row.name] = update
+            row.update(update)
+
+    # The failed messages keep their lease until this is committed, and are retried after it otherwise
+    if failures:
+        frappe.db.bulk_update(OUTBOX_DOCTYPE, failures)
+        frappe.db.commit()  # nosemgrep
+
+
+def record_sent_message(row: frappe._dict) -> None:
+    """
+    Commit the sent status of the outbox message, and save its timestamp in
+    the reference document if asked, e.g. for the thread replies
+    """
+    frappe.db.set_value(
+        OUTBOX_DOCTYPE,
+        row.name,
+        {
+            "status": row.status,
+            "attempts": row.attempts,
+            "next_attempt_at": row.next_attempt_at,
+            "sent_at": row.sent_at,
+            "message_ts": row.message_ts,
+            "last_error": row.last_error,
+        },
+    )
+    if row.reference_ts_field and row.reference_doctype and row.reference_name:
+        frappe.db.set_value(
+            row.reference_doctype,
+            row.reference_name,
+            row.reference_ts_field,
+            row.message_ts,
+            update_modified=False,
+        )
+    frappe.db.commit()  # nosemgrep
@@ -0,0 +1,132 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import ClassVar
+
+import frappe
+from slack_sdk.errors import SlackApiError
+
+from frappe_slack_connector.slack.app import SlackIntegration, get_retry_after
+
+####################################################################
+#                                                                  #
+# Slack Message Sender                                             #
+# -----------------------------------------------------------------#
+# Sends messages concurrently through a bounded pool of workers,   #
+# spacing the calls as per the Slack rate limit tier of the method #
+# and retrying the rate limited calls after `Retry-After`          #
+#                                                                  #
+####################################################################
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing out the calls made to a Slack API method
+    """
+
+    def __init__(self, calls_per_minute: int):
+        self.interval = 60 / calls_per_minute
+        self.next_call_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        """
+        Block until the next call is allowed
+        """
+        with self.lock:
+            now = time.monotonic()
+            call_at = max(now, self.next_call_at)
+            self.next_call_at = call_at + self.interval
+        time.sleep(call_at - now)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back all the calls for the given number of seconds
+        """
+        with self.lock:
+            self.next_call_at = max(self.next_call_at, time.monotonic() + seconds)
+
+
+class SlackMessageSender:
+    # Calls per minute allowed for the Slack API methods, as per their tier
+    # https://api.slack.com/apis/rate-limits
+    METHOD_RATE_LIMITS: ClassVar[dict[str, int]] = {
+        "chat_postMessage": 300,  # Special tier, bursts across channels are allowed
+        "chat_postEphemeral": 100,  # Tier 4
+        "chat_update": 50,  # Tier 3
+    }
+    DEFAULT_RATE_LIMIT = 20  # Tier 2
+
+    # Slack allows about one message per second to a single channel
+    CHANNEL_INTERVAL = 1
+
+    # Limiters are shared by all the senders of a site in the worker process
+    _rate_limiters: ClassVar[dict[tuple[str, str], RateLimiter]] = {}
+    _rate_limiters_lock = threading.Lock()
+
+    def __init__(self, slack: SlackIntegration, *, max_workers: int = 4, max_retries: int = 3):
+        self.slack = slack
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+
+    def iter_send(self, messages: list, method: str = "chat_postMessage"):
+        """
+        Send the messages with the given Slack API method
+        Each message is a dict with the keyword arguments for the API call
+        Messages to different channels are sent concurrently, while the messages
+        to the same channel are sent one after another in the given order
+        Yields the index of each message with its result (`ok`, `response`, `error`)
+        as soon as it is sent, in the calling thread
+        """
+        if not messages:
+            return
+
+        channels = {}
+        for index, message in enumerate(messages):
+            channels.setdefault(message.get("channel"), []).append(index)
+
+        rate_limiter = self.get_rate_limiter(method)
+        api_method = getattr(self.slack.slack_app.client, method)
+        results = queue.SimpleQueue()
+
+        def send_to_channel(indexes: list) -> None:
+            for position, index in enumerate(indexes):
+                if position:
+                    time.sleep(self.CHANNEL_INTERVAL)
+                results.put((index, self.call(api_method, messages[index], rate_limiter)))
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(channels))) as executor:
+            for indexes in channels.values():
+                executor.submit(send_to_channel, indexes)
+
+            for _ in range(len(messages)):
+                yield results.get()
+
+    def call(self, api_method, kwargs: dict, rate_limiter: RateLimiter) -> frappe._dict:
+        """
+        Call the Slack API method, retrying with backoff when rate limited
+        NOTE: Runs in the worker threads, so it must not use the frappe request context
+        """
+        for attempt in range(self.max_retries + 1):
+            rate_limiter.wait()
+            try:
+                return frappe._dict(ok=True, response=api_method(**kwargs), error=None)
+            except SlackApiError as e:
+                if e.response.status_code != 429 or attempt == self.max_retries:
+                    return frappe._dict(ok=False, response=e.response, error=e)
+
+                # The limit applies to the whole app, so hold back the other workers too
+                rate_limiter.pause(max(get_retry_after(e.response.headers), 2**attempt))
+            except Exception as e:
+                return frappe._dict(ok=False, response=None, error=e)
+
+    def get_rate_limiter(self, method: str) -> RateLimiter:
+        """
+        Get the rate limiter for the given method on the current site
+        """
+        key = (frappe.local.site, method)
+        with self._rate_limiters_lock:
+            if key not in self._rate_limiters:
+                self._rate_limiters[key] = RateLimiter(self.METHOD_RATE_LIMITS.get(method, self.DEFAULT_RATE_LIMIT))
+            return self._rate_limiters[key]
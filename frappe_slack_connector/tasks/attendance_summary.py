@@ -1,18 +1,21 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import frappe
 from erpnext.setup.doctype.holiday_list.holiday_list import is_holiday
 from frappe import _
-from frappe.utils import get_time, getdate, today
+from frappe.utils import get_time, getdate, now_datetime, today
 
 from frappe_slack_connector.db.leave_application import (
     custom_fields_exist,
-    get_employees_on_leave,
+    get_attendance_snapshot,
 )
-from frappe_slack_connector.db.user_meta import get_user_meta
 from frappe_slack_connector.helpers.error import generate_error_log
+from frappe_slack_connector.helpers.run_lock import run_once
 from frappe_slack_connector.helpers.standard_date import standard_date_fmt
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.slack.app import get_slack_integration
+from frappe_slack_connector.slack.outbox import queue_messages
+
+ATTENDANCE_NEXT_RUN_CACHE_KEY = "slack_attendance_next_run"
 
 
 def attendance_channel() -> None:
@@ -24,7 +27,13 @@ def attendance_channel() -> None:
      - Check if the current date is a working day (weekends, holidays)
      - Check if current date notification is sent
      - If not, send the notification, set the updated date in Slack Settings
+    The checks only run when the summary is due, the next run is cached in between
     """
+    # Runs on every scheduler tick, so bail out early until the summary is due
+    next_run_at = frappe.cache.get_value(ATTENDANCE_NEXT_RUN_CACHE_KEY)
+    if next_run_at and now_datetime() < next_run_at:
+        return
+
     slack_settings = frappe.get_single("Slack Settings")
 
     current_date = frappe.utils.nowdate()
@@ -37,21 +46,73 @@ def attendance_channel() -> None:
             slack_settings.last_attendance_date is not None
             and slack_settings.last_attendance_date == frappe.utils.nowdate()
         )
+        or not slack_settings.attendance_time
         or frappe.utils.now_datetime().time() < get_time(slack_settings.attendance_time)
     ):
+        set_next_run(slack_settings)
         return
 
-    # Send the attendance summary to the Slack channel
-    message_ts = send_notification(
-        slack_settings.leave_notification_subject
-        if slack_settings.leave_notification_subject
-        else "Employees on Leave"  # Default title
+    # Only one worker posts the summary of the day, even if the ticks overlap
+    with run_once("attendance_summary", current_date) as should_run:
+        if not should_run:
+            return
+
+        # Send the attendance summary to the Slack channel
+        message_ts = send_notification(
+            slack_settings.leave_notification_subject
+            if slack_settings.leave_notification_subject
+            else "Employees on Leave"  # Default title
+        )
+
+        # Update the last attendance date
+        # Set directly, a save would rebuild the cached Slack Integration in every worker each day
+        slack_settings.last_attendance_date = frappe.utils.nowdate()
+        slack_settings.last_attendance_msg_ts = message_ts
+        frappe.db.set_single_value(
+            "Slack Settings",
+            {
+                "last_attendance_date": slack_settings.last_attendance_date,
+                "last_attendance_msg_ts": slack_settings.last_attendance_msg_ts,
+            },
+        )
+
+    set_next_run(slack_settings)
+
+
+def set_next_run(slack_settings) -> None:
+    """
+    Cache when the attendance summary is due next, so that the ticks before then
+    return after a single cache read
+    i.e. the attendance time on the next weekday, today if not reached and not sent yet
+    The cache is cleared whenever the Slack Settings are saved
+    """
+    now = now_datetime()
+    if slack_settings.send_attendance_updates != 1 or not slack_settings.attendance_time:
+        # Nothing to send until the settings change, check again in a day just in case
+        next_run_at = now + timedelta(days=1)
+    else:
+        next_run_at = datetime.combine(now.date(), get_time(slack_settings.attendance_time))
+        if now >= next_run_at or (
+            slack_settings.last_attendance_date and getdate(slack_settings.last_attendance_date) == getdate(today())
+        ):
+            next_run_at += timedelta(days=1)
+
+        # Skip the weekends, the holidays are checked once the summary is due
+        while next_run_at.weekday() > 4:
+            next_run_at += timedelta(days=1)
+
+    frappe.cache.set_value(
+        ATTENDANCE_NEXT_RUN_CACHE_KEY,
+        next_run_at,
+        expires_in_sec=int((next_run_at - now).total_seconds()) + 60,
     )
 
-    # Update the last attendance date
-    slack_settings.last_attendance_date = frappe.utils.nowdate()
-    slack_settings.last_attendance_msg_ts = message_ts
-    slack_settings.save(ignore_permissions=True)
+
+def clear_next_run() -> None:
+    """
+    Clear the cached next run, so that the next tick checks the settings again
+    """
+    frappe.cache.delete_value(ATTENDANCE_NEXT_RUN_CACHE_KEY)
 
 
 def send_notification(attendance_title: str) -> str | None:
@@ -59,19 +120,18 @@ def send_notification(attendance_title: str) -> str | None:
     Background job to post the attendance summary to the Slack channel
     Returns the message timestamp if successful
     """
-    slack = SlackIntegration()
+    slack = get_slack_integration()
     mention_users = frappe.db.get_single_value("Slack Settings", "mention_user")
     leave_groups = {"Full Day": [], "Half Day": []}
     if custom_fields_exist():
         leave_groups["First-Half"] = []
         leave_groups["Second-Half"] = []
 
-    users_on_leave = get_employees_on_leave()
+    users_on_leave = get_attendance_snapshot()
     for user_application in users_on_leave:
-        user_slack = get_user_meta(employee_id=user_application.get("employee"))
         slack_name = (
-            f"<@{user_slack.custom_slack_userid}>"
-            if user_slack and user_slack.custom_slack_userid and mention_users
+            f"<@{user_application.slack_id}>"
+            if user_application.slack_id and mention_users
             else user_application.employee_name
         )
 
@@ -89,22 +149,34 @@ def send_notification(attendance_title: str) -> str | None:
 
     leave_details_mrkdwn = format_leave_groups(leave_groups)
 
-    try:
-        message = slack.slack_app.client.chat_postMessage(
-            channel=slack.SLACK_CHANNEL_ID,
-            blocks=format_attendance_blocks(
-                date_string=standard_date_fmt(frappe.utils.nowdate()),
-                attendance_title=attendance_title,
-                employee_count=len(users_on_leave),
-                leave_details_mrkdwn=leave_details_mrkdwn,
-            ),
-        )
-        return message["ts"]
-    except Exception as e:
+    # Sent right away, as the message timestamp is needed for the thread replies
+    # If it fails, the outbox retries it in the background and saves the timestamp once sent
+    rows = queue_messages(
+        [
+            {
+                "channel": slack.SLACK_CHANNEL_ID,
+                "idempotency_key": f"attendance-summary:{frappe.utils.nowdate()}",
+                "blocks": format_attendance_blocks(
+                    date_string=standard_date_fmt(frappe.utils.nowdate()),
+                    attendance_title=attendance_title,
+                    employee_count=len(users_on_leave),
+                    leave_details_mrkdwn=leave_details_mrkdwn,
+                ),
+            }
+        ],
+        reference_doctype="Slack Settings",
+        reference_name="Slack Settings",
+        reference_ts_field="last_attendance_msg_ts",
+        deliver_now=True,
+    )
+    # Already sent today, the existing message is returned in place of the duplicate
+    if rows[0].status == "Sent":
+        return rows[0].message_ts
+
+    if rows[0].last_error:
         generate_error_log(
             title=_("Error posting message to Slack"),
-            message=_("Please check the channel ID and try again."),
-            exception=e,
+            message=_("Please check the channel ID and try again.") + f"\n{rows[0].last_error}",
             msgprint=True,
             realtime=True,
         )
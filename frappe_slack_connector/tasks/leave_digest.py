@@ -0,0 +1,267 @@
+from datetime import timedelta
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import get_url_to_form, now_datetime
+
+from frappe_slack_connector.db.user_meta import get_slack_details
+from frappe_slack_connector.helpers.standard_date import standard_date_fmt
+from frappe_slack_connector.helpers.str_utils import truncate_text
+from frappe_slack_connector.slack.interactions.approve_leave import LEAVE_BULK_ACTIONS_BLOCK, LEAVE_BULK_SELECT
+from frappe_slack_connector.slack.outbox import queue_messages
+
+LEAVE_DIGEST_DOCTYPE = "Slack Leave Digest Entry"
+LEAVE_DIGEST_DUE_CACHE_KEY = "slack_leave_digest_due_at"
+
+# Slack allows up to 50 blocks in a message, each leave takes 3 blocks
+# along with the header, the bulk actions and the footer
+LEAVES_PER_MESSAGE = 15
+
+
+def queue_leave_for_digest(doc: Document) -> None:
+    """
+    Queue the leave application for the digest of its approver
+    The entry is saved in the same transaction as the leave application, and the
+    digest is sent once the window since the oldest queued application has passed
+    """
+    if not doc.leave_approver:
+        return
+
+    frappe.get_doc(
+        {
+            "doctype": LEAVE_DIGEST_DOCTYPE,
+            "leave_application": doc.name,
+            "leave_approver": doc.leave_approver,
+        }
+    ).insert(ignore_permissions=True, ignore_if_duplicate=True)
+
+    # Check when the digests are due again once the entry is committed
+    frappe.db.after_commit.add(clear_digest_due_at)
+
+
+def send_leave_digests() -> None:
+    """
+    Scheduler job to send the leave approval digests which are due
+    Runs on every scheduler tick, but returns after a single cache read
+    until the oldest queued application is due
+    """
+    due_at = frappe.cache.get_value(LEAVE_DIGEST_DUE_CACHE_KEY)
+    if due_at and now_datetime() < due_at:
+        return
+
+    now = now_datetime()
+    window = timedelta(minutes=frappe.db.get_single_value("Slack Settings", "leave_approval_digest_window") or 0)
+
+    # Lock the queued entries, so that overlapping ticks do not send the same digest
+    entries = frappe.get_all(
+        LEAVE_DIGEST_DOCTYPE,
+        fields=["name", "leave_application", "leave_approver", "creation"],
+        order_by="creation asc",
+        for_update=True,
+    )
+    queues = {}
+    for entry in entries:
+        queues.setdefault(entry.leave_approver, []).append(entry)
+
+    due_queues = {}
+    next_due_at = now + timedelta(days=1)
+    for approver, queue in queues.items():
+        if queue[0].creation + window <= now:
+            due_queues[approver] = [entry.leave_application for entry in queue]
+        else:
+            next_due_at = min(next_due_at, queue[0].creation + window)
+
+    if due_queues:
+        # The digest messages are queued in the outbox in the same transaction
+        send_digest_messages(due_queues)
+        frappe.db.delete(
+            LEAVE_DIGEST_DOCTYPE,
+            {"name": ["in", [entry.name for approver in due_queues for entry in queues[approver]]]},
+        )
+    frappe.db.commit()  # nosemgrep
+
+    frappe.cache.set_value(
+        LEAVE_DIGEST_DUE_CACHE_KEY,
+        next_due_at,
+        expires_in_sec=int((next_due_at - now).total_seconds()) + 60,
+    )
+
+
+def clear_digest_due_at() -> None:
+    """
+    Clear the cached due time of the digests, so that the next tick checks the queue again
+    """
+    frappe.cache.delete_value(LEAVE_DIGEST_DUE_CACHE_KEY)
+
+
+def send_digest_messages(due_queues: dict) -> None:
+    """
+    Send the digest of the pending leave applications to each of the approvers
+    Applications which are already approved, rejected or deleted are skipped
+    """
+    leaves = frappe.get_all(
+        "Leave Application",
+        filters={
+            "name": ["in", [leave for leaves in due_queues.values() for leave in leaves]],
+            "status": "Open",
+            "docstatus": 0,
+        },
+        fields=[
+            "name",
+            "employee",
+            "employee_name",
+            "leave_type",
+            "from_date",
+            "to_date",
+            "half_day",
+            "description",
+            "leave_approver",
+        ],
+        order_by="creation asc",
+    )
+    if not leaves:
+        return
+
+    approvers = get_slack_details(user_ids=list(due_queues))
+    employees = get_slack_details(employee_ids=[leave.employee for leave in leaves])
+
+    messages = []
+    for approver, leave_ids in due_queues.items():
+        approver_slack = approvers.get(approver)
+        if not approver_slack or not approver_slack.slack_id:
+            continue
+
+        approver_leaves = [leave for leave in leaves if leave.name in leave_ids]
+        for i in range(0, len(approver_leaves), LEAVES_PER_MESSAGE):
+            messages.append(
+                {
+                    "channel": approver_slack.slack_id,
+                    # Each leave is only queued in one digest, so the first one identifies it
+                    "idempotency_key": f"leave-digest:{approver_leaves[i].name}",
+                    "text": f"{len(approver_leaves)} leave applications are awaiting your approval",
+                    "blocks": format_leave_digest_blocks(
+                        approver_leaves[i : i + LEAVES_PER_MESSAGE],
+                        employees,
+                        total=len(approver_leaves),
+                    ),
+                }
+            )
+
+    queue_messages(messages)
+
+
+def format_leave_digest_blocks(leaves: list, employees: dict, total: int) -> list:
+    """
+    Format the blocks for the leave approval digest
+    Each leave application has its own actions block, with the leave ID in the block ID
+    """
+    blocks = [
+        {
+            "type": "header",
+            "text": {
+                "type": "plain_text",
+                "text": f":memo: {total} Leave Applications Awaiting Approval",
+                "emoji": True,
+            },
+        },
+    ]
+
+    for leave in leaves:
+        employee = employees.get(leave.employee)
+        mention = f"<@{employee.slack_id}>" if employee and employee.slack_id else leave.employee_name
+        dates = standard_date_fmt(leave.from_date)
+        if leave.to_date != leave.from_date:
+            dates += f" → {standard_date_fmt(leave.to_date)}"
+
+        blocks.extend(
+            [
+                {"type": "divider"},
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": f"*{mention}* • <{get_url_to_form('Leave Application', leave.name)}|{leave.name}>\n"
+                        + f":rocket: {leave.leave_type}{' (Half Day)' if leave.half_day else ''} • :date: {dates}\n"
+                        + f">{leave.description or 'No reason provided'}",
+                    },
+                },
+                {
+                    "type": "actions",
+                    "block_id": f"leave_actions_block_{leave.name}",
+                    "elements": [
+                        {
+                            "type": "button",
+                            "text": {"type": "plain_text", "emoji": True, "text": "Approve"},
+                            "style": "primary",
+                            "value": leave.name,
+                            "action_id": "leave_approve",
+                        },
+                        {
+                            "type": "button",
+                            "text": {"type": "plain_text", "emoji": True, "text": "Reject"},
+                            "style": "danger",
+                            "value": leave.name,
+                            "action_id": "leave_reject",
+                        },
+                    ],
+                },
+            ]
+        )
+
+    # Select multiple leave applications to approve or reject them at once
+    if len(leaves) > 1:
+        blocks.extend(
+            [
+                {"type": "divider"},
+                {
+                    "type": "actions",
+                    "block_id": LEAVE_BULK_ACTIONS_BLOCK,
+                    "elements": [
+                        {
+                            "type": "multi_static_select",
+                            "action_id": LEAVE_BULK_SELECT,
+                            "placeholder": {"type": "plain_text", "text": "Select leave applications"},
+                            "options": [
+                                {
+                                    "text": {
+                                        "type": "plain_text",
+                                        # Limit the text to 75 characters
+                                        "text": truncate_text(
+                                            f"{leave.employee_name} ({standard_date_fmt(leave.from_date)})"
+                                        ),
+                                    },
+                                    "value": leave.name,
+                                }
+                                for leave in leaves
+                            ],
+                        },
+                        {
+                            "type": "button",
+                            "text": {"type": "plain_text", "emoji": True, "text": "Approve Selected"},
+                            "style": "primary",
+                            "action_id": "leave_bulk_approve",
+                        },
+                        {
+                            "type": "button",
+                            "text": {"type": "plain_text", "emoji": True, "text": "Reject Selected"},
+                            "style": "danger",
+                            "action_id": "leave_bulk_reject",
+                        },
+                    ],
+                },
+            ]
+        )
+
+    blocks.append(
+        {
+            "type": "context",
+            "block_id": "footer_block",
+            "elements": [
+                {
+                    "type": "mrkdwn",
+                    "text": "Please review and take action on these leave requests.",
+                }
+            ],
+        }
+    )
+    return blocks
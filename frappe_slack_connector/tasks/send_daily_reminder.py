@@ -1,104 +1,348 @@
-import time
+import zlib
+from datetime import timedelta
+from math import ceil
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import frappe
-from frappe.utils import add_days, get_time, getdate
+from frappe.utils import add_days, datetime, get_system_timezone, get_time, getdate, now_datetime
 
-from frappe_slack_connector.db.employee import check_if_date_is_holiday
-from frappe_slack_connector.db.timesheet import get_employee_daily_working_norm, get_reported_time_by_employee
+from frappe_slack_connector.db.timesheet import get_daily_working_norm, get_reported_time_by_employees
+from frappe_slack_connector.db.user_meta import get_slack_details
 from frappe_slack_connector.helpers.error import generate_error_log
+from frappe_slack_connector.helpers.run_lock import task_lock
 from frappe_slack_connector.helpers.standard_date import standard_date_fmt
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.helpers.work_calendar import WorkCalendar
+from frappe_slack_connector.slack.app import SlackIntegration, get_slack_integration
+from frappe_slack_connector.slack.outbox import queue_messages
+
+REMINDER_RUN_DOCTYPE = "Slack Reminder Run"
+
+# Employees reminded by each background job
+REMINDER_SHARD_SIZE = 200
+
+# The shards of a run which have not completed are enqueued again on the next ticks, until
+# the attempts run out. The jobs of the shards still queued or running are deduplicated
+REMINDER_MAX_ATTEMPTS = 3
+REMINDER_RETRY_INTERVAL = timedelta(minutes=30)
 
 
 def send_reminder():
     """
     Send a reminder to the employees who have not made their daily
     time entries on the previous day
+    The employees are bucketed by the timezone of their Slack profile,
+    and each bucket is reminded at the notification time in its timezone
+    Each bucket and local date has a Slack Reminder Run, which tracks the shards until all of them complete
     Conditions:
      - Check if reminder is enabled
-     - Check if last notification date is not the current date
+     - Check if the local time of the bucket has passed the notification time
+     - Check if the bucket has no run yet on its local date
+    The runs in progress for a while have their pending shards enqueued again
     """
     slack_settings = frappe.get_single("Slack Settings")
-    if (
-        not slack_settings.timesheet_previousday_reminder
-        or (
-            slack_settings.last_timesheet_notification_date is not None
-            and slack_settings.last_timesheet_notification_date == frappe.utils.nowdate()
-        )
-        or frappe.utils.now_datetime().time() < get_time(slack_settings.timesheet_daily_notification_time)
-    ):
+    if not slack_settings.timesheet_previousday_reminder:
         return
 
-    send_slack_notification(slack_settings.reminder_template, slack_settings.allowed_departments)
+    # Only one worker starts and retries the runs, even if the ticks overlap
+    with task_lock("timesheet_reminder") as acquired:
+        if not acquired:
+            return
 
-    slack_settings.last_timesheet_notification_date = frappe.utils.nowdate()
-    slack_settings.save(ignore_permissions=True)
+        notification_time = get_time(slack_settings.timesheet_daily_notification_time)
+        system_timezone = get_system_timezone()
+        timezones = get_reminder_timezones(system_timezone)
 
+        due_buckets = {}
+        for timezone in timezones:
+            local_date, local_time = get_local_datetime(timezone)
+            if local_time >= notification_time:
+                due_buckets[get_run_key(timezone, local_date)] = (timezone, local_date)
+        if due_buckets:
+            started = frappe.get_all(
+                REMINDER_RUN_DOCTYPE, filters={"run_key": ["in", list(due_buckets)]}, pluck="run_key"
+            )
+            for run_key in started:
+                due_buckets.pop(run_key)
+
+        stalled_runs = frappe.get_all(
+            REMINDER_RUN_DOCTYPE,
+            filters={"status": "In Progress", "last_attempt_at": ["<", now_datetime() - REMINDER_RETRY_INTERVAL]},
+            fields=["name", "timezone", "local_date", "expected_shards", "pending_shards", "attempts", "last_error"],
+        )
+        if not due_buckets and not stalled_runs:
+            return
+
+        bucket_employees = get_bucket_employees(
+            slack_settings.allowed_departments,
+            list({timezone for timezone, _ in due_buckets.values()} | {run.timezone for run in stalled_runs}),
+            timezones,
+            system_timezone,
+        )
+        for run in stalled_runs:
+            retry_reminder_run(run, slack_settings.reminder_template, bucket_employees.get(run.timezone, []))
 
-def send_slack_notification(reminder_template: str, allowed_departments: list):
+        for run_key, (timezone, local_date) in due_buckets.items():
+            start_reminder_run(
+                run_key,
+                slack_settings.reminder_template,
+                bucket_employees.get(timezone, []),
+                timezone,
+                local_date,
+            )
+
+        # Commit the runs before releasing the lock, so the next holder does not start them again
+        frappe.db.commit()  # nosemgrep
+
+
+def get_run_key(timezone: str, local_date: datetime.date) -> str:
     """
-    Send the notification to the Slack users
+    Get the key of the reminder run of the timezone bucket on its local date
     """
-    slack = SlackIntegration()
-    current_date = getdate()
-    date = add_days(current_date, -1)
+    return f"{timezone}:{local_date}"
 
-    reminder_template = frappe.get_doc("Email Template", reminder_template)
+
+def get_reminder_timezones(system_timezone: str) -> set:
+    """
+    Get the timezones of the Slack profiles of the users, along with the
+    system timezone for the employees whose timezone is not known
+    """
+    timezones = frappe.get_all(
+        "User Meta",
+        filters={"custom_slack_timezone": ["is", "set"]},
+        pluck="custom_slack_timezone",
+        distinct=True,
+    )
+    return {system_timezone} | {get_bucket_timezone(timezone, system_timezone) for timezone in timezones}
+
+
+def get_bucket_timezone(timezone: str | None, system_timezone: str) -> str:
+    """
+    Get the timezone of the reminder bucket for the given Slack timezone
+    Falls back to the system timezone if it is not set or not valid
+    """
+    if not timezone:
+        return system_timezone
+    try:
+        ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        return system_timezone
+    return timezone
+
+
+def get_local_datetime(timezone: str) -> tuple[datetime.date, datetime.time]:
+    """
+    Get the current date and time in the given timezone
+    """
+    local_now = datetime.datetime.now(ZoneInfo(timezone))
+    return local_now.date(), local_now.time()
+
+
+def get_bucket_employees(
+    allowed_departments: list,
+    due_timezones: list,
+    timezones: set,
+    system_timezone: str,
+) -> dict:
+    """
+    Get the active employees of the allowed departments in the due timezone buckets,
+    grouped by bucket, in a single query which only loads the employees of these buckets
+    The system timezone bucket also has the employees whose timezone is not set,
+    or is not one of the valid bucket timezones
+    """
     allowed_departments = [doc.department for doc in allowed_departments]
-    employees = frappe.get_all(
-        "Employee",
-        filters={"status": "Active", "department": ["in", allowed_departments]},
-        fields="*",
+    if not allowed_departments:
+        return {}
+
+    Employee = frappe.qb.DocType("Employee")
+    UserMeta = frappe.qb.DocType("User Meta")
+    timezone_condition = UserMeta.custom_slack_timezone.isin(due_timezones)
+    if system_timezone in due_timezones:
+        timezone_condition |= UserMeta.custom_slack_timezone.isnull() | UserMeta.custom_slack_timezone.notin(
+            list(timezones)
+        )
+
+    rows = (
+        frappe.qb.from_(Employee)
+        .left_join(UserMeta)
+        .on(UserMeta.user == Employee.user_id)
+        .select(Employee.name, UserMeta.custom_slack_timezone.as_("timezone"))
+        .where(Employee.status == "Active")
+        .where(Employee.department.isin(allowed_departments))
+        .where(timezone_condition)
+    ).run(as_dict=True)
+
+    bucket_employees = {}
+    for row in rows:
+        bucket_employees.setdefault(get_bucket_timezone(row.timezone, system_timezone), []).append(row.name)
+    return bucket_employees
+
+
+def start_reminder_run(
+    run_key: str,
+    reminder_template: str,
+    employees: list,
+    timezone: str,
+    local_date: datetime.date,
+):
+    """
+    Record the run of the timezone bucket, and fan out its reminders, for the day
+    before its local date, to background jobs on the long queue
+    The employees are partitioned into shards by a hash of their ID, and each shard
+    is sent by its own job, so that the reminders of large teams are spread across workers
+    """
+    shard_count = ceil(len(employees) / REMINDER_SHARD_SIZE)
+    run = frappe.get_doc(
+        {
+            "doctype": REMINDER_RUN_DOCTYPE,
+            "run_key": run_key,
+            "timezone": timezone,
+            "local_date": local_date,
+            "status": "In Progress" if shard_count else "Completed",
+            "expected_shards": shard_count,
+            "pending_shards": ",".join(str(shard) for shard in range(shard_count)),
+            "attempts": 1,
+            "last_attempt_at": now_datetime(),
+        }
+    ).insert(ignore_permissions=True)
+
+    enqueue_reminder_shards(run, reminder_template, employees, list(range(shard_count)))
+
+
+def retry_reminder_run(run: frappe._dict, reminder_template: str, employees: list):
+    """
+    Enqueue the pending shards of the run again, the ones which failed or were lost
+    The run is marked as failed once the attempts run out
+    """
+    if run.attempts >= REMINDER_MAX_ATTEMPTS:
+        frappe.db.set_value(REMINDER_RUN_DOCTYPE, run.name, "status", "Failed")
+        generate_error_log(
+            title="Error sending the timesheet reminders",
+            message=f"Slack Reminder Run: {run.name}\nPending shards: {run.pending_shards}\n{run.last_error or ''}",
+        )
+        return
+
+    frappe.db.set_value(
+        REMINDER_RUN_DOCTYPE,
+        run.name,
+        {"attempts": run.attempts + 1, "last_attempt_at": now_datetime()},
     )
+    enqueue_reminder_shards(run, reminder_template, employees, get_pending_shards(run))
 
-    for employee in employees:
-        user_slack = slack.get_slack_user_id(employee_id=employee, from_api=True)
-        if not user_slack:
-            continue
-        if check_if_date_is_holiday(date, employee.name):
-            continue
 
-        daily_norm = get_employee_daily_working_norm(employee.name)
+def enqueue_reminder_shards(run: frappe._dict, reminder_template: str, employees: list, shards: list):
+    """
+    Enqueue the jobs of the given shards of the run, once the current transaction is committed
+    The jobs of the shards still queued or running are not enqueued again
+    """
+    date = add_days(run.local_date, -1)
+    shard_employees = [[] for _ in range(run.expected_shards)]
+    for employee in employees:
+        shard_employees[zlib.crc32(employee.encode()) % run.expected_shards].append(employee)
 
-        # check if the employee has taken a half-day
-        # and set the daily norm accordingly
-        half_days = frappe.get_all(
-            "Leave Application",
-            {
-                "employee": employee.name,
-                "half_day_date": str(date),
-                "half_day": 1,
-                "status": (
-                    "in",
-                    ["Open", "Approved"],
-                ),
-            },
+    for shard in shards:
+        frappe.enqueue(
+            send_reminder_shard,
+            queue="long",
+            job_id=f"slack_timesheet_reminder:{run.timezone}:{date}:{shard}",
+            deduplicate=True,
+            enqueue_after_commit=True,
+            run=run.name,
+            shard=shard,
+            employees=shard_employees[shard],
+            date=str(date),
+            reminder_template=reminder_template,
         )
-        # if half day is taken for both the first and second half of the day,
-        # then consider full day leave
-        if len(half_days) > 1:
-            continue
-        elif half_days:
-            daily_norm = daily_norm / 2
 
-        hour = get_reported_time_by_employee(employee.name, date)
-        if hour >= daily_norm:
-            continue
 
-        # Send slack notification to user
+def send_reminder_shard(run: str, shard: int, employees: list, date: str, reminder_template: str):
+    """
+    Background job to send the reminders to a shard of the employees, and complete the shard in the run
+    Errors are recorded in the run and raised, so that the job is marked as failed,
+    and the shard is enqueued again on a later tick
+    """
+    try:
+        send_reminders(employees, getdate(date), reminder_template)
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.db.set_value(REMINDER_RUN_DOCTYPE, run, "last_error", f"Shard {shard}: {e}")
+        frappe.db.commit()  # nosemgrep
+        raise
+
+    complete_reminder_shard(run, shard)
+
+
+def complete_reminder_shard(run: str, shard: int):
+    """
+    Remove the shard from the pending shards of the run, and complete the run once none is pending
+    The run is locked meanwhile, as its shards complete concurrently
+    """
+    run = frappe.db.get_value(
+        REMINDER_RUN_DOCTYPE,
+        run,
+        ["name", "status", "expected_shards", "pending_shards"],
+        as_dict=True,
+        for_update=True,
+    )
+    if not run:
+        return
+
+    pending_shards = [pending for pending in get_pending_shards(run) if pending != shard]
+    frappe.db.set_value(
+        REMINDER_RUN_DOCTYPE,
+        run.name,
+        {
+            "pending_shards": ",".join(str(pending) for pending in pending_shards),
+            "completed_shards": run.expected_shards - len(pending_shards),
+            "status": run.status if pending_shards else "Completed",
+        },
+    )
+    frappe.db.commit()  # nosemgrep
+
+
+def get_pending_shards(run: frappe._dict) -> list:
+    """
+    Get the indexes of the shards of the run which have not completed yet
+    """
+    return [int(shard) for shard in (run.pending_shards or "").split(",") if shard]
+
+
+def send_reminders(employee_names: list, date: datetime.date, reminder_template: str):
+    """
+    Send the reminders to the given employees, with a rate-limited sender of this job
+    The messages which fail are left in the outbox to be retried
+    """
+    slack = get_slack_integration()
+    reminder_template = frappe.get_doc("Email Template", reminder_template)
+    employees = frappe.get_all(
+        "Employee",
+        filters={"name": ["in", employee_names], "status": "Active"},
+        fields="*",
+    )
+
+    messages = []
+    for employee in get_employees_to_remind(slack, employees, date):
         try:
             args = {
                 "date": standard_date_fmt(date),
                 "name": employee.employee_name,
-                "logged_time": hour,
-                "mention": f"<@{user_slack}>",
-                "daily_norm": daily_norm,
+                "logged_time": employee.logged_time,
+                "mention": f"<@{employee.slack_id}>",
+                "daily_norm": employee.daily_norm,
             }
             # nosemgrep
             message = frappe.render_template(reminder_template.response_html, args)
-            slack.slack_app.client.chat_postMessage(
-                channel=user_slack,
-                blocks=[
+        except Exception as e:
+            generate_error_log(
+                title="Error sending slack message",
+                exception=e,
+            )
+            continue
+
+        messages.append(
+            {
+                "channel": employee.slack_id,
+                "idempotency_key": f"timesheet-reminder:{date}:{employee.name}",
+                "blocks": [
                     {
                         "type": "section",
                         "text": {
@@ -124,12 +368,64 @@ def send_slack_notification(reminder_template: str, allowed_departments: list):
                         ],
                     },
                 ],
-            )
-        except Exception as e:
-            generate_error_log(
-                title="Error sending slack message",
-                exception=e,
-            )
+            }
+        )
+
+    # Send the slack notifications to the users right away, within the Slack rate limits
+    queue_messages(messages, deliver_now=True)
+
+
+def get_employees_to_remind(slack: SlackIntegration, employees: list, date: datetime.date) -> list:
+    """
+    Get the employees who have logged less than their daily norm on the given date
+    The holidays, leaves, reported time and Slack IDs of all the employees are
+    fetched upfront in a few queries and the eligibility is evaluated in memory
+    Sets `slack_id`, `daily_norm` and `logged_time` on the returned employee rows
+    """
+    if not employees:
+        return []
+
+    employee_names = [employee.name for employee in employees]
+    calendar = WorkCalendar(employees, date, date)
+    reported_time = get_reported_time_by_employees(employee_names, date)
+    slack_details = get_slack_details(employee_ids=employee_names)
+    standard_working_hours = frappe.db.get_single_value("HR Settings", "standard_working_hours")
+
+    employees_to_remind = []
+    for employee in employees:
+        if not calendar.is_working_day(employee.name, date):
+            continue
+
+        daily_norm = get_daily_working_norm(employee, standard_working_hours)
+
+        # check if the employee has taken a half-day
+        # and set the daily norm accordingly
+        # if half day is taken for both the first and second half of the day,
+        # then consider full day leave
+        half_days = calendar.get_half_day_count(employee.name, date)
+        if half_days > 1:
+            continue
+        elif half_days:
+            daily_norm = daily_norm / 2
+
+        logged_time = reported_time.get(employee.name, 0)
+        if logged_time >= daily_norm:
+            continue
+
+        # Only look up the Slack API for the employees who are not linked yet
+        slack_id = slack_details[employee.name].slack_id if employee.name in slack_details else None
+        if not slack_id and employee.user_id:
+            slack_id = slack.get_slack_user_id(user_email=employee.user_id, check_meta=False, from_api=True)
+        if not slack_id:
+            continue
+
+        employee.update(
+            {
+                "slack_id": slack_id,
+                "daily_norm": daily_norm,
+                "logged_time": logged_time,
+            }
+        )
+        employees_to_remind.append(employee)
 
-        # NOTE:  Sleep for 1 second to avoid rate limiting
-        time.sleep(1)
+    return employees_to_remind
@@ -2,10 +2,12 @@ import frappe
 from frappe import _ as translate
 from frappe.utils import add_days, get_weekday, getdate
 
-from frappe_slack_connector.db.employee import check_if_date_is_holiday
-from frappe_slack_connector.db.timesheet import get_employee_daily_working_norm, is_next_pms_installed
+from frappe_slack_connector.db.timesheet import get_employees_daily_working_norm, is_next_pms_installed
+from frappe_slack_connector.db.user_meta import get_slack_details
 from frappe_slack_connector.helpers.error import generate_error_log
-from frappe_slack_connector.slack.app import SlackIntegration
+from frappe_slack_connector.helpers.run_lock import run_once_per_day
+from frappe_slack_connector.helpers.work_calendar import WorkCalendar, get_daily_allocated_hours
+from frappe_slack_connector.slack.outbox import queue_messages
 
 IMPORT_SUCCESS = True
 
@@ -24,25 +26,25 @@ except ImportError:
 
 
 def get_workload_data(start_date, end_date):
-    """Fetch employees, their allocations, and leaves in the given date range."""
+    """Fetch employees, their allocations, and the holiday/leave calendar for the given date range."""
 
     # Fetch target designations from Timesheet Settings
     timesheet_settings = frappe.get_doc("Timesheet Settings")
     designations = [d.designation for d in timesheet_settings.designations]
 
     if not designations:
-        return [], {}, {}
+        return [], {}, None
 
     # Fetch Active employees matching the specified designations
     employees = frappe.get_all(
         "Employee",
         filters={"status": "Active", "designation": ["in", designations]},
-        fields=["name", "employee_name", "reports_to", "user_id"],
+        fields=["name", "employee_name", "reports_to", "user_id", "holiday_list", "company"],
     )
 
     employee_names = [emp.name for emp in employees]
     if not employee_names:
-        return [], {}, {}
+        return [], {}, None
 
     allocations = get_allocation_list_for_employee_for_given_range(
         columns=[
@@ -57,43 +59,34 @@ def get_workload_data(start_date, end_date):
         end_date=end_date,
     )
 
-    leaves = frappe.get_all(
-        "Leave Application",
-        filters=[
-            ["employee", "in", employee_names],
-            ["docstatus", "in", [0, 1]],
-            ["status", "in", ["Open", "Approved"]],
-            ["from_date", "<=", end_date],
-            ["to_date", ">=", start_date],
-        ],
-        fields=["employee", "from_date", "to_date"],
-    )
-
-    # Group allocations and leaves by employee
+    # Group allocations by employee
     allocation_map = {}
     for alloc in allocations:
         allocation_map.setdefault(alloc.get("employee"), []).append(alloc)
 
-    leave_map = {}
-    for leave in leaves:
-        leave_map.setdefault(leave.get("employee"), []).append(leave)
+    return employees, allocation_map, WorkCalendar(employees, start_date, end_date)
 
-    return employees, allocation_map, leave_map
 
+def get_manager_directory(employees):
+    """
+    Build the directory of Reporting Managers for the given employees.
+    Name, user and Slack ID of all the distinct managers are fetched in a single query.
+    """
+    managers = list({emp.reports_to for emp in employees if emp.reports_to})
+    return get_slack_details(employee_ids=managers)
 
-def get_pm_details(slack, reports_to, mention_users=True):
-    """Get the Slack ID and name for the Reporting Manager"""
-    if not reports_to:
-        return None, "N/A"
 
-    pm_user_id = frappe.db.get_value("Employee", reports_to, "user_id")
-    pm_name = frappe.db.get_value("Employee", reports_to, "employee_name")
+def get_pm_details(manager_directory, reports_to, mention_users=True):
+    """Get the Slack ID and name for the Reporting Manager from the manager directory"""
+    manager = manager_directory.get(reports_to) if reports_to else None
+    if not manager:
+        return None, "N/A"
 
     slack_id = None
-    if pm_user_id and mention_users:
-        slack_id = slack.get_slack_user_id(employee_id=reports_to)
+    if manager.user and mention_users:
+        slack_id = manager.slack_id or None
 
-    return slack_id, pm_name or "N/A"
+    return slack_id, manager.employee_name or "N/A"
 
 
 def get_mention_text(slack_id, fallback_name):
@@ -122,12 +115,14 @@ def get_mention_cell(slack_id, fallback_name, include_name=False):
     return {"type": "raw_text", "text": str(fallback_name)}
 
 
-def send_blocks_in_chunks(slack, channel, blocks):
-    """Slack limits messages to 50 blocks. Chunk and send if exceeded."""
+def send_blocks_in_chunks(channel, blocks, idempotency_key):
+    """Slack limits messages to 50 blocks. Chunk and queue in the outbox if exceeded."""
     chunk_size = 50
-    for i in range(0, len(blocks), chunk_size):
-        chunk = blocks[i : i + chunk_size]
-        slack.slack_app.client.chat_postMessage(channel=channel, blocks=chunk)
+    messages = [
+        {"channel": channel, "blocks": blocks[i : i + chunk_size], "idempotency_key": f"{idempotency_key}:{i}"}
+        for i in range(0, len(blocks), chunk_size)
+    ]
+    queue_messages(messages)
 
 
 # ==========================================
@@ -135,6 +130,7 @@ def send_blocks_in_chunks(slack, channel, blocks):
 # ==========================================
 
 
+@run_once_per_day("daily_workload_reminder")
 def send_daily_workload_reminder():
     """Triggered daily. Alerts if today's allocation is incomplete."""
     slack_settings = frappe.get_single("Slack Settings")
@@ -156,36 +152,28 @@ def send_daily_workload_reminder():
     target_channel = slack_settings.workload_channel_id or "#workload"
     mention_users = slack_settings.workload_mention_users
 
-    slack = SlackIntegration()
-    employees, allocation_map, leave_map = get_workload_data(date, date)
+    employees, allocation_map, calendar = get_workload_data(date, date)
+    manager_directory = get_manager_directory(employees)
+    employee_directory = get_slack_details(employee_ids=[emp.name for emp in employees]) if mention_users else {}
+    working_norms = get_employees_daily_working_norm([emp.name for emp in employees])
 
     underallocated_users = []
 
     for emp in employees:
-        daily_norm = get_employee_daily_working_norm(emp.name)
+        daily_norm = working_norms[emp.name]
 
-        if check_if_date_is_holiday(date, emp.name):
+        if calendar.get_days_off(emp.name, date, 1)[0]:
             continue
 
-        leaves = leave_map.get(emp.name, [])
-        on_leave = any(leave.get("from_date") <= date <= leave.get("to_date") for leave in leaves)
-        if on_leave:
-            continue
-
-        allocs = [
-            a
-            for a in allocation_map.get(emp.name, [])
-            if a.get("allocation_start_date") <= date <= a.get("allocation_end_date")
-        ]
-        total_allocated = sum(a.get("hours_allocated_per_day") or 0 for a in allocs)
+        total_allocated = get_daily_allocated_hours(allocation_map.get(emp.name, []), date, 1)[0]
         unallocated = max(0, daily_norm - total_allocated)
 
         if unallocated > 0:
             user_slack_id = None
-            if mention_users and emp.user_id:
-                user_slack_id = frappe.db.get_value("User Meta", {"user": emp.user_id}, "custom_slack_userid")
+            if mention_users and emp.name in employee_directory:
+                user_slack_id = employee_directory[emp.name].slack_id
 
-            pm_slack_id, pm_name = get_pm_details(slack, emp.reports_to, mention_users)
+            pm_slack_id, pm_name = get_pm_details(manager_directory, emp.reports_to, mention_users)
 
             underallocated_users.append(
                 {
@@ -219,7 +207,7 @@ def send_daily_workload_reminder():
     section_texts = format_daily_workload_groups(sorted_managers)
     blocks = format_daily_workload_blocks(len(underallocated_users), section_texts)
 
-    send_blocks_in_chunks(slack, target_channel, blocks)
+    send_blocks_in_chunks(target_channel, blocks, idempotency_key=f"workload-daily:{date}")
 
 
 def format_daily_workload_groups(sorted_managers: list) -> list:
@@ -297,6 +285,7 @@ def format_daily_workload_blocks(employee_count: int, section_texts: list) -> li
 # ==========================================
 
 
+@run_once_per_day("weekly_workload_reminder")
 def send_weekly_workload_reminder():
     """Triggered weekly. Generates a table of underallocated hours for the week."""
     slack_settings = frappe.get_single("Slack Settings")
@@ -330,51 +319,32 @@ def send_weekly_workload_reminder():
 
     end_date = add_days(monday, 4)  # Friday
 
-    slack = SlackIntegration()
-    employees, allocation_map, leave_map = get_workload_data(monday, end_date)
+    employees, allocation_map, calendar = get_workload_data(monday, end_date)
+    manager_directory = get_manager_directory(employees)
+    employee_directory = get_slack_details(employee_ids=[emp.name for emp in employees]) if mention_users else {}
+    working_norms = get_employees_daily_working_norm([emp.name for emp in employees])
 
     table_data = []
 
     for emp in employees:
-        daily_norm = get_employee_daily_working_norm(emp.name)
-
-        leaves = leave_map.get(emp.name, [])
-        allocs = allocation_map.get(emp.name, [])
-
-        day_unallocated = []
-        has_underallocation = False
+        daily_norm = working_norms[emp.name]
 
-        for i in range(5):  # Mon to Fri
-            cur_date = add_days(monday, i)
+        days_off = calendar.get_days_off(emp.name, monday, 5)  # Mon to Fri
+        allocated_hours = get_daily_allocated_hours(allocation_map.get(emp.name, []), monday, 5)
 
-            # Check for Holidays!
-            if check_if_date_is_holiday(cur_date, emp.name):
-                day_unallocated.append(0)
-                continue
-
-            on_leave = any(leave.get("from_date") <= cur_date <= leave.get("to_date") for leave in leaves)
-
-            if on_leave:
-                day_unallocated.append(0)
-                continue
-
-            cur_allocs = [
-                a for a in allocs if a.get("allocation_start_date") <= cur_date <= a.get("allocation_end_date")
-            ]
-            total_allocated = sum(a.get("hours_allocated_per_day") or 0 for a in cur_allocs)
-
-            unallocated = max(0, daily_norm - total_allocated)
-            day_unallocated.append(unallocated)
-
-            if unallocated > 0:
-                has_underallocation = True
+        # Holidays and leaves are not counted as unallocated
+        day_unallocated = [
+            0 if day_off else max(0, daily_norm - allocated)
+            for day_off, allocated in zip(days_off, allocated_hours, strict=True)
+        ]
+        has_underallocation = any(unallocated > 0 for unallocated in day_unallocated)
 
         if has_underallocation:
             user_slack_id = None
-            if mention_users and emp.user_id:
-                user_slack_id = frappe.db.get_value("User Meta", {"user": emp.user_id}, "custom_slack_userid")
+            if mention_users and emp.name in employee_directory:
+                user_slack_id = employee_directory[emp.name].slack_id
 
-            pm_slack_id, pm_name = get_pm_details(slack, emp.reports_to, mention_users)
+            pm_slack_id, pm_name = get_pm_details(manager_directory, emp.reports_to, mention_users)
 
             table_data.append(
                 {
@@ -410,6 +380,7 @@ def send_weekly_workload_reminder():
     header_row.append({"type": "raw_text", "text": "Reporting Manager"})
 
     chunk_size = 90
+    messages = []
     first_message = True
     total_chunks = (len(table_data) + chunk_size - 1) // chunk_size
 
@@ -457,5 +428,13 @@ def send_weekly_workload_reminder():
                 }
             )
 
-        slack.slack_app.client.chat_postMessage(channel=target_channel, blocks=payload_blocks)
+        messages.append(
+            {
+                "channel": target_channel,
+                "blocks": payload_blocks,
+                "idempotency_key": f"workload-weekly:{monday}:{i}",
+            }
+        )
         first_message = False
+
+    queue_messages(messages)